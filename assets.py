@@ -0,0 +1,193 @@
+import json
+import os
+import struct
+import threading
+
+import pygame
+
+# Font lookups and decoded sounds are cached between runs, so starting the
+# game neither scans the system fonts nor decodes WAV files again.
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                         'asteroidgame')
+
+# Sample cache layout: header, then per sound a record followed by its name
+# and its samples, already in the mixer's format so they load as they are.
+_SAMPLES_MAGIC = b'AGSM'
+_SAMPLES_HEADER = struct.Struct('<4sH')  # magic, sound count
+_SAMPLE_RECORD = struct.Struct('<HqqI')  # name length, source mtime (ns), source size, sample bytes
+
+class AssetManager:
+    def __init__(self, cache_dir=CACHE_DIR, audio=True):
+        self.cache_dir = cache_dir
+        self.audio = audio
+        self.fonts = {}
+        self.font_paths = self._read_font_paths()
+        self.sound_files = {}
+        self.sounds = {}
+        self.loader = None
+        self.ready = False  # the mixer is open and every sound loaded
+
+    def font(self, names, size):
+        # names is a comma separated list like SysFont takes. A font that
+        # isn't installed is cached as None, pygame's default font.
+        key = (names, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            return font
+        if names in self.font_paths and (self.font_paths[names] is None
+                                         or os.path.exists(self.font_paths[names])):
+            path = self.font_paths[names]
+        else:
+            path = self.font_paths[names] = pygame.font.match_font(names)
+            self._write_font_paths()
+        font = self.fonts[key] = pygame.font.Font(path, size)
+        return font
+
+    def add_sound(self, name, path):
+        self.sound_files[name] = path
+
+    def load_sounds(self):
+        # Opens the mixer and loads every sound on a worker thread, so
+        # neither holds up a frame
+        if self.audio and self.loader is None:
+            self.loader = threading.Thread(target=self._load_sounds, daemon=True)
+            self.loader.start()
+
+    def _load_sounds(self):
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"ERROR: no audio: {e}")
+            return
+        frequency, size, channels = pygame.mixer.get_init()
+        cache_path = os.path.join(self.cache_dir, f'samples-{frequency}-{size}-{channels}.bin')
+        cached = self._read_samples(cache_path)
+        stale = False
+        for name, path in self.sound_files.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                print(f"ERROR: Sound file {path} is missing!")
+                continue
+            entry = cached.get(name)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self.sounds[name] = pygame.mixer.Sound(buffer=entry[2])
+                continue
+            sound = self.sounds[name] = pygame.mixer.Sound(path)
+            cached[name] = (stat.st_mtime_ns, stat.st_size, sound.get_raw())
+            stale = True
+        if stale:
+            self._write_samples(cache_path, cached)
+        self.ready = True
+
+    def _read_font_paths(self):
+        try:
+            with open(os.path.join(self.cache_dir, 'fonts.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_font_paths(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, 'fonts.json'), 'w') as f:
+                json.dump(self.font_paths, f, indent=2)
+        except OSError:
+            pass  # the fonts get looked up again next time
+
+    def _read_samples(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return {}
+        if len(data) < _SAMPLES_HEADER.size:
+            return {}
+        magic, count = _SAMPLES_HEADER.unpack_from(data)
+        if magic != _SAMPLES_MAGIC:
+            return {}
+        view = memoryview(data)
+        offset = _SAMPLES_HEADER.size
+        samples = {}
+        try:
+            for _ in range(count):
+                name_len, mtime, size, length = _SAMPLE_RECORD.unpack_from(data, offset)
+                offset += _SAMPLE_RECORD.size
+                name = bytes(view[offset:offset + name_len]).decode()
+                offset += name_len
+                if offset + length > len(data):
+                    return {}
+                samples[name] = (mtime, size, bytes(view[offset:offset + length]))
+                offset += length
+        except (struct.error, UnicodeDecodeError):
+            return {}
+        return samples
+
+    def _write_samples(self, path, samples):
+        parts = [_SAMPLES_HEADER.pack(_SAMPLES_MAGIC, len(samples))]
+        for name, (mtime, size, raw) in samples.items():
+            encoded = name.encode()
+            parts += [_SAMPLE_RECORD.pack(len(encoded), mtime, size, len(raw)), encoded, raw]
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b''.join(parts))
+        except OSError:
+            pass
+
+class SoundManager:
+    # Plays the sounds named by simulation events, once per frame however
+    # often a sound came up in it. Each sound owns a few reserved channels;
+    # when all are busy its oldest voice is cut off, so a burst of shots
+    # can't starve the explosions or pile up voices in the mixer.
+    def __init__(self, assets, voices=None, default_voices=2):
+        self.assets = assets
+        self.voices = voices or {}
+        self.default_voices = default_voices
+        self.queued = []
+        self.channels = None
+        self.coalesced = 0
+        self.stolen = 0
+
+    def queue(self, events):
+        for name in events:
+            if name in self.queued:
+                self.coalesced += 1
+            else:
+                self.queued.append(name)
+
+    def flush(self):
+        # Call once per frame, outside the simulation step
+        queued = self.queued
+        self.queued = []
+        if self.channels is None:
+            if not self.assets.ready:
+                self.assets.load_sounds()
+                return
+            self._reserve_channels()
+        for name in queued:
+            sound = self.assets.sounds.get(name)
+            if sound is None:
+                continue
+            pool = self.channels[name]
+            channel = next((c for c in pool if not c.get_busy()), None)
+            if channel is None:
+                channel = pool[0]
+                self.stolen += 1
+            # The pool stays ordered from the longest playing voice
+            pool.remove(channel)
+            pool.append(channel)
+            channel.play(sound)
+
+    def _reserve_channels(self):
+        names = list(self.assets.sounds)
+        counts = [self.voices.get(name, self.default_voices) for name in names]
+        total = sum(counts)
+        # Reserved channels are never handed out to Sound.play elsewhere
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), total))
+        pygame.mixer.set_reserved(total)
+        self.channels = {}
+        first = 0
+        for name, count in zip(names, counts):
+            self.channels[name] = [pygame.mixer.Channel(i) for i in range(first, first + count)]
+            first += count
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from profiler import FrameProfiler, percentile
+from simulation import Game, Input, SMALL, parse_seed, screen_width, screen_height
+
+# Each scenario is (setup, step): setup(game) runs once after the level
+# starts, step(game, tick) returns the Input for that tick.
+
+def setup_level_20(game):
+    game.level = 20
+    game.start_level()
+
+def step_sweep_fire(game, tick):
+    return Input(left=tick % 120 < 60, right=tick % 120 >= 60,
+                 up=tick % 90 < 20, fire=True)
+
+def setup_rapid_fire(game):
+    game.level = 5
+    game.start_level()
+
+def step_rapid_fire(game, tick):
+    ship = game.spaceship
+    ship.rapid_fire = 300
+    ship.triple_shot = 300
+    return Input(left=True, fire=True)
+
+def setup_mass_explosions(game):
+    # The level's own asteroids stay around so the level never completes
+    pass
+
+def step_mass_explosions(game, tick):
+    # Every half second, a field of small asteroids each with a bullet
+    # right next to it, so they all blow up on the same tick.
+    if tick % 30 == 0:
+        for row in range(6):
+            for col in range(10):
+                x = 40 + col * 80
+                y = 50 + row * 100
+                game.asteroids.spawn(game.asteroid_pool.acquire(SMALL, x, y, game.rng))
+                game.bullets.spawn(x - 10, y, 0)
+    return Input(left=True)
+
+def setup_particle_load(game):
+    game.level = 3
+    game.start_level()
+
+def step_particle_load(game, tick):
+    if len(game.particles) < 5000:
+        game.particles.spawn(screen_width / 2, screen_height / 2,
+                             [(255, 255, 255), (255, 255, 0), (255, 0, 0)], 200)
+    return step_sweep_fire(game, tick)
+
+def setup_big_world(game):
+    game.level = 5
+    game.start_level()
+
+SCENARIOS = {
+    'level_20': (setup_level_20, step_sweep_fire, 3000),
+    'rapid_fire': (setup_rapid_fire, step_rapid_fire, 3000),
+    'mass_explosions': (setup_mass_explosions, step_mass_explosions, 3000),
+    'particle_load': (setup_particle_load, step_particle_load, 20000),
+    'big_world': (setup_big_world, step_sweep_fire, 3000),
+}
+
+# Scenarios played on a bigger world than the screen
+WORLDS = {
+    'big_world': (8000, 6000),
+}
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'mean': sum(values) / len(values) if values else 0.0,
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'max': values[-1] if values else 0.0,
+    }
+
+def run_scenario(name, ticks=None, draw=True, seed=1):
+    setup, step, default_ticks = SCENARIOS[name]
+    ticks = ticks or default_ticks
+
+    game = Game(seed, *WORLDS.get(name, (screen_width, screen_height)))
+    profiler = FrameProfiler(window=ticks)
+    game.profiler = profiler
+    game.update(Input(start=True))
+    game.update(Input(cheat=True))
+    setup(game)
+
+    renderer = None
+    if draw:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        import game as frontend
+        renderer = frontend.Renderer(seed)
+        renderer.profiler = profiler
+        screen = frontend.screen
+
+    update_ms = []
+    draw_ms = []
+    peaks = {'asteroids': 0, 'bullets': 0, 'particles': 0, 'powerups': 0}
+    start = time.perf_counter()
+    for tick in range(ticks):
+        inputs = step(game, tick)
+        t0 = time.perf_counter()
+        game.update(inputs)
+        t1 = time.perf_counter()
+        update_ms.append((t1 - t0) * 1000)
+        if renderer:
+            renderer.draw(screen, game)
+            draw_ms.append((time.perf_counter() - t1) * 1000)
+        if game.spaceship.lives < 10:
+            game.spaceship.lives = 999
+
+        for key, value in (('asteroids', len(game.asteroids) + len(game.dormant_asteroids)),
+                           ('bullets', len(game.bullets)),
+                           ('particles', len(game.particles)),
+                           ('powerups', len(game.powerups))):
+            if value > peaks[key]:
+                peaks[key] = value
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'ticks': ticks,
+        'ticks_per_second': ticks / (sum(update_ms) / 1000),
+        'wall_seconds': elapsed,
+        'update_ms': summarize(update_ms),
+        'draw_ms': summarize(draw_ms) if draw else None,
+        'peak_counts': peaks,
+        'pool_stats': game.pool_stats(),
+        'sections': profiler.stats(),
+    }
+    if resource:
+        # KiB on Linux, bytes on macOS
+        result['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+def run_isolated(name, ticks, draw, seed):
+    # A fresh process per scenario keeps the memory high-water mark honest
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_scenario, name, ticks, draw, seed).result()
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"{'scenario':<18}{'metric':<20}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, result in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        metrics = [('ticks_per_second', base['ticks_per_second'],
+                    result['ticks_per_second'], True)]
+        if base.get('draw_ms') and result.get('draw_ms'):
+            metrics.append(('draw_ms mean', base['draw_ms']['mean'],
+                            result['draw_ms']['mean'], False))
+        for metric, old, new, higher_is_better in metrics:
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            if flag:
+                regressions.append((name, metric))
+            print(f"{name:<18}{metric:<20}{old:12.2f}{new:12.2f}{change:+8.1f}%{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless AsteroidGame benchmarks")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument('--ticks', type=int, help="override each scenario's length")
+    parser.add_argument('--no-draw', action='store_true',
+                        help="benchmark the simulation only")
+    parser.add_argument('--seed', type=parse_seed, default=1)
+    parser.add_argument('--out', metavar='PATH', help="write results as JSON")
+    parser.add_argument('--baseline', metavar='PATH',
+                        help="compare against an earlier --out file")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="percent slowdown counted as a regression")
+    args = parser.parse_args()
+
+    import numpy
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'scenarios': {},
+    }
+    for name in args.scenario or SCENARIOS:
+        result = run_isolated(name, args.ticks, not args.no_draw, args.seed)
+        results['scenarios'][name] = result
+        draw = result['draw_ms']
+        draw_text = f"draw {draw['mean']:.2f} ms (p95 {draw['p95']:.2f})" if draw else "no draw"
+        print(f"{name:<18}{result['ticks_per_second']:9.0f} ticks/s  {draw_text}  "
+              f"peaks {result['peak_counts']}  pools {result['pool_stats']}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
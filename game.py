@@ -1,675 +1,748 @@
+import argparse
+import asyncio
 import pygame
 import math
+import os
 import random
 import time
-
-pygame.init()
+from collections import OrderedDict
+
+import numpy as np
+
+from assets import AssetManager, SoundManager
+from profiler import FrameProfiler, NULL_PROFILER
+from replay import Recorder
+from simulation import (
+    Game, Input, screen_width, screen_height, BLACK, WHITE, RED, GREEN, YELLOW,
+    TRAIL_LENGTH, TICK_RATE, HELD_BITS, PRESS_BITS, COS, SIN, TRIG_OFFSET, SHIP_HULL,
+    parse_seed,
+)
+
+# Only what the first frame needs starts up here; the mixer and the sounds
+# follow on a worker thread, and not at all without a real audio driver.
+pygame.display.init()
 pygame.font.init()
 
-screen_width = 800
-screen_height = 600
 screen = pygame.display.set_mode((screen_width, screen_height))
 pygame.display.set_caption("AsteroidGame")
 
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-YELLOW = (255, 255, 0)
+assets = AssetManager(audio=os.environ.get('SDL_AUDIODRIVER') != 'dummy')
 
-font_large = pygame.font.SysFont('Arial', 40)
-font_medium = pygame.font.SysFont('Arial', 24)
-font_small = pygame.font.SysFont('Arial', 16)
+font_large = assets.font('Arial', 40)
+font_medium = assets.font('Arial', 24)
+font_small = assets.font('Arial', 16)
+font_mono = assets.font('Courier New,monospace', 14)
 
 clock = pygame.time.Clock()
 
-pygame.mixer.init()
-
-try:
-    shoot_sound = pygame.mixer.Sound('shoot.wav')
-    explosion_sound = pygame.mixer.Sound('explosion.wav')
-    thrust_sound = pygame.mixer.Sound.play
-    level_up_sound = pygame.mixer.Sound.play
-except:
-    print("ERROR: Sound files are missing!")
-    shoot_sound = pygame.mixer.Sound.play
-    explosion_sound = pygame.mixer.Sound.play
-    thrust_sound = pygame.mixer.Sound.play
-    level_up_sound = pygame.mixer.Sound.play
-
-stars = [(random.randint(0, screen_width), random.randint(0, screen_height), random.random())
-         for _ in range(100)]
-
-SMALL = 1
-MEDIUM = 2
-LARGE = 3
-
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = random.randint(1, 3)
-        self.lifetime = random.randint(20, 40)
-        speed = random.uniform(0.5, 2.0)
-        angle = random.uniform(0, 2 * math.pi)
-        self.dx = speed * math.cos(angle)
-        self.dy = speed * math.sin(angle)
-
-    def update(self):
-        self.x += self.dx
-        self.y += self.dy
-        self.lifetime -= 1
-
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.size)
-
-class Powerup:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 15
-        self.type = random.choice(['shield', 'triple_shot', 'rapid_fire'])
-        self.color = {
-            'shield': (0, 191, 255),      # Deep sky blue
-            'triple_shot': (255, 105, 180), # Hot pink
-            'rapid_fire': (255, 215, 0)     # Gold
-        }[self.type]
-        self.lifetime = 600  # 10 seconds at 60 FPS
-
-    def update(self):
-        self.lifetime -= 1
-
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-
-        if self.type == 'shield':
-            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), 8, 2)
-        elif self.type == 'triple_shot':
-            pygame.draw.line(screen, WHITE, (self.x-5, self.y), (self.x+5, self.y), 2)
-            pygame.draw.line(screen, WHITE, (self.x-5, self.y-5), (self.x+5, self.y+5), 2)
-            pygame.draw.line(screen, WHITE, (self.x-5, self.y+5), (self.x+5, self.y-5), 2)
-        elif self.type == 'rapid_fire':
-            pygame.draw.line(screen, WHITE, (self.x-5, self.y), (self.x+5, self.y), 2)
-            pygame.draw.line(screen, WHITE, (self.x, self.y-5), (self.x, self.y+5), 2)
-
-class Asteroid:
-    def __init__(self, size, x, y):
-        self.size = size
-        self.x = x
-        self.y = y
-
-        if size == SMALL:
-            self.radius = 20
-            self.hp = 1
-            self.color = (0, 0, random.randint(200, 255))  # Shades of blue
-            self.score_value = 100
-            speed = random.uniform(3, 5)
-        elif size == MEDIUM:
-            self.radius = 40
-            self.hp = 2
-            self.color = (0, random.randint(200, 255), 0)  # Shades of green
-            self.score_value = 50
-            speed = random.uniform(2, 4)
-        elif size == LARGE:
-            self.radius = 60
-            self.hp = 3
-            self.color = (random.randint(200, 255), 0, 0)  # Shades of red
-            self.score_value = 20
-            speed = random.uniform(1, 3)
-
-        angle = random.uniform(0, 2 * math.pi)
-        self.dx = speed * math.cos(angle)
-        self.dy = speed * math.sin(angle)
-        self.rotation = 0
-        self.rotation_speed = random.uniform(-2, 2)
-
-        num_sides = random.randint(6, 10)
-        self.points = []
-        for i in range(num_sides):
-            angle = 2 * math.pi * i / num_sides
-            r = self.radius + random.uniform(-self.radius * 0.3, self.radius * 0.3)
-            px = r * math.cos(angle)
-            py = r * math.sin(angle)
-            self.points.append((px, py))
-
-    def update(self):
-        self.x += self.dx
-        self.y += self.dy
-        self.rotation += self.rotation_speed
-
-        if self.x < -self.radius:
-            self.x = screen_width + self.radius
-        elif self.x > screen_width + self.radius:
-            self.x = -self.radius
-        if self.y < -self.radius:
-            self.y = screen_height + self.radius
-        elif self.y > screen_height + self.radius:
-            self.y = -self.radius
-
-    def draw(self, screen):
-        rot_rad = math.radians(self.rotation)
-        translated_points = []
-        for px, py in self.points:
-            rx = px * math.cos(rot_rad) - py * math.sin(rot_rad)
-            ry = px * math.sin(rot_rad) + py * math.cos(rot_rad)
-            translated_points.append((self.x + rx, self.y + ry))
-
-        pygame.draw.polygon(screen, self.color, translated_points)
-
-        inner_color = [(255, 0, 0), (255, 255, 0), (0, 255, 0)][self.hp-1]
-        pygame.draw.circle(screen, inner_color, (int(self.x), int(self.y)), int(self.radius / 4))
-
-class Spaceship:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.angle = 0
-        self.dx = 0
-        self.dy = 0
-        self.max_speed = 5
-        self.points = [(-10, -10), (20, 0), (-10, 10), (0, 0)]
-        self.lives = 3
-        self.shield = 0
-        self.shield_strength = 100
-        self.respawn_timer = 0
-        self.invulnerable_timer = 0
-        self.fire_cooldown = 0
-        self.rapid_fire = 0
-        self.triple_shot = 0
-        self.thrust_particles = []
-
-    def update(self):
-        if self.respawn_timer > 0:
-            self.respawn_timer -= 1
+# Simulation events that have a sound attached
+assets.add_sound("shoot", 'shoot.wav')
+assets.add_sound("explosion", 'explosion.wav')
+# Voices each sound may have playing at once
+sounds = SoundManager(assets, {"shoot": 3, "explosion": 4})
+
+HP_COLORS = [(255, 0, 0), (255, 255, 0), (0, 255, 0)]
+
+class AsteroidSpriteCache:
+    def __init__(self, buckets=64, max_bytes=32 * 1024 * 1024):
+        self.buckets = buckets
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.sprites = OrderedDict()
+
+    def get(self, asteroid, rotation=None):
+        if rotation is None:
+            rotation = asteroid.rotation
+        bucket = round(rotation * self.buckets / 360) % self.buckets
+        key = (asteroid.shape_id, asteroid.hp, bucket)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        # pygame rotates counterclockwise, the simulation's angles are clockwise
+        sprite = pygame.transform.rotate(self.rasterize(asteroid),
+                                         -bucket * 360 / self.buckets)
+        self.sprites[key] = sprite
+        self.bytes += sprite.get_pitch() * sprite.get_height()
+        while self.bytes > self.max_bytes and len(self.sprites) > 1:
+            _, old = self.sprites.popitem(last=False)
+            self.bytes -= old.get_pitch() * old.get_height()
+        return sprite
+
+    def rasterize(self, asteroid):
+        extent = math.ceil(max(math.hypot(px, py) for px, py in asteroid.points)) + 1
+        surface = pygame.Surface((extent * 2, extent * 2), pygame.SRCALPHA)
+        pygame.draw.polygon(surface, asteroid.color,
+                            [(extent + px, extent + py) for px, py in asteroid.points])
+        pygame.draw.circle(surface, HP_COLORS[asteroid.hp-1], (extent, extent),
+                           int(asteroid.radius / 4))
+        return surface
+
+class TextCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.static = {}
+
+    def render(self, font, text, color, static=False):
+        # Static strings are kept for good, changing ones (score, lives,
+        # messages) go through a small LRU and re-render only on change.
+        key = (font, text, color)
+        if static:
+            surface = self.static.get(key)
+            if surface is None:
+                surface = self.static[key] = font.render(text, True, color)
+            return surface
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = self.surfaces[key] = font.render(text, True, color)
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+class Starfield:
+    def __init__(self, width, height, count=100, layers=1, seed=None):
+        rng = random.Random(seed)
+        self.width = width
+        self.height = height
+        # Layer 0 is the opaque, fixed backdrop; extra layers are keyed
+        # overlays that scroll progressively faster for parallax.
+        self.layers = []
+        for layer in range(layers):
+            surface = pygame.Surface((width, height))
+            surface.fill(BLACK)
+            if layer > 0:
+                surface.set_colorkey(BLACK)
+            self.layers.append((surface, layer / layers))
+
+        for i in range(count):
+            x, y, brightness = rng.randint(0, width), rng.randint(0, height), rng.random()
+            size = 1 if brightness < 0.5 else 2
+            color = (int(255 * brightness),
+                    int(255 * brightness),
+                    int(255 * brightness))
+            surface = self.layers[i % layers][0]
+            pygame.draw.circle(surface, color, (int(x), int(y)), size)
+
+    def draw(self, screen, offset_x=0, offset_y=0, layers=None):
+        # layers limits drawing to the backdrop and that many overlays less one
+        for surface, depth in self.layers[:layers]:
+            sx = int(-offset_x * depth) % self.width
+            sy = int(-offset_y * depth) % self.height
+            screen.blit(surface, (sx, sy))
+            if sx:
+                screen.blit(surface, (sx - self.width, sy))
+            if sy:
+                screen.blit(surface, (sx, sy - self.height))
+            if sx and sy:
+                screen.blit(surface, (sx - self.width, sy - self.height))
+
+def rotate_points(points, angle):
+    cos = COS[angle + TRIG_OFFSET]
+    sin = SIN[angle + TRIG_OFFSET]
+    return [(px * cos - py * sin, px * sin + py * cos) for px, py in points]
+
+def lerp_wrapped(previous, current, alpha, size):
+    # A jump of over half the playfield is a wrap, which is drawn as is
+    delta = current - previous
+    if abs(delta) > size / 2:
+        return current
+    return previous + delta * alpha
+
+def make_stamp(color, radius):
+    stamp = pygame.Surface((radius * 2, radius * 2))
+    stamp.set_colorkey(BLACK)
+    pygame.draw.circle(stamp, color, (radius, radius), radius)
+    return stamp, radius
+
+def make_trail_stamps():
+    # stamps[n][i] is the i-th oldest dot of an n-long trail, fading in
+    # from blue to white and growing towards the bullet
+    stamps = [[]]
+    for length in range(1, TRAIL_LENGTH + 1):
+        row = []
+        for i in range(length):
+            alpha = int(255 * i / length)
+            row.append(make_stamp((alpha, alpha, 255), int(1 + i / 2)))
+        stamps.append(row)
+    return stamps
+
+class Renderer:
+    def __init__(self, seed=None, star_count=100, star_layers=1, dirty_rects=False):
+        self.starfield = Starfield(screen_width, screen_height, star_count,
+                                   star_layers, seed)
+        # Dirty-rect mode erases last frame's entities from a fixed copy of
+        # the starfield (no parallax scrolling) and only updates what changed.
+        self.dirty_rects = dirty_rects
+        self.drawn = []
+        if dirty_rects:
+            self.background = pygame.Surface((screen_width, screen_height))
+            self.starfield.draw(self.background)
+            self.previous_rects = [self.background.get_rect()]
+        self.asteroid_sprites = AsteroidSpriteCache()
+        self.text = TextCache()
+        self.trail_stamps = make_trail_stamps()
+        self.bullet_stamp = make_stamp(WHITE, 2)
+        self.profiler = NULL_PROFILER
+        self.alpha = 1.0
+        # The ship outline turned to every whole degree
+        self.ship_hulls = [rotate_points(SHIP_HULL, angle) for angle in range(360)]
+        # Detail settings the quality governor turns down under load
+        self.trail_length = TRAIL_LENGTH
+        self.thruster_flicker = True
+        self.star_layers = None
+        self.show_profiler = False
+        self.profiler_lines = []
+        self.profiler_age = 0
+
+    def draw(self, screen, game, alpha=1.0):
+        # Returns the screen areas that changed in dirty-rect mode, or None
+        # when the whole frame was redrawn and needs a flip. alpha places
+        # moving things between the previous tick (0) and the latest (1).
+        self.drawn = []
+        # Nothing moves outside of play, so there is nothing to blend
+        self.alpha = alpha if game.state == "playing" else 1.0
+        self.set_view(game)
+        profiler = self.profiler
+        with profiler.section('draw_background'):
+            if self.dirty_rects:
+                for rect in self.previous_rects:
+                    screen.blit(self.background, rect, rect)
+            else:
+                ship_x, ship_y, _ = self.ship_pose(game.spaceship)
+                self.starfield.draw(screen, ship_x - screen_width // 2,
+                                    ship_y - screen_height // 2, self.star_layers)
+
+        with profiler.section('draw_asteroids'):
+            for asteroid in game.asteroids:
+                self.draw_asteroid(screen, asteroid)
+
+        with profiler.section('draw_bullets'):
+            self.draw_bullets(screen, game.bullets)
+
+        with profiler.section('draw_particles'):
+            self.draw_particles(screen, game.particles)
+
+        with profiler.section('draw_powerups'):
+            for powerup in game.powerups:
+                self.draw_powerup(screen, powerup)
+
+        with profiler.section('draw_ship'):
+            if game.state != "game_over":
+                for ship in game.living_ships():
+                    self.draw_spaceship(screen, ship)
+
+        with profiler.section('draw_ui'):
+            self.draw_ui(screen, game)
+
+        if self.show_profiler:
+            self.draw_profiler(screen)
+
+        if not self.dirty_rects:
+            return None
+        changed = self.previous_rects + self.drawn
+        self.previous_rects = self.drawn
+        return changed
+
+    def set_view(self, game):
+        # A world the size of the screen is drawn as is; a bigger one is
+        # seen through a camera that follows the first ship around
+        self.world = (game.width, game.height)
+        if self.world == (screen_width, screen_height):
+            self.camera = None
+        else:
+            x, y, _ = self.ship_pose(game.spaceship)
+            self.camera = (x - screen_width / 2, y - screen_height / 2)
+
+    def to_screen(self, x, y, margin):
+        # None when nothing within margin of the point can be on screen
+        if self.camera is None:
+            return x, y
+        width, height = self.world
+        sx = (x - self.camera[0] + margin) % width - margin
+        sy = (y - self.camera[1] + margin) % height - margin
+        if sx > screen_width + margin or sy > screen_height + margin:
+            return None
+        return sx, sy
+
+    def points_to_screen(self, pos, margin):
+        # Vectorised to_screen: screen positions and which are visible
+        if self.camera is None:
+            return pos, None
+        screen_pos = (pos - self.camera + margin) % self.world - margin
+        visible = ((screen_pos[:, 0] <= screen_width + margin)
+                   & (screen_pos[:, 1] <= screen_height + margin))
+        return screen_pos, visible
+
+    def ship_pose(self, ship):
+        alpha = self.alpha
+        if alpha >= 1:
+            return ship.x, ship.y, ship.angle
+        x = lerp_wrapped(ship.prev_x, ship.x, alpha, self.world[0])
+        y = lerp_wrapped(ship.prev_y, ship.y, alpha, self.world[1])
+        turn = (ship.angle - ship.prev_angle + 180) % 360 - 180
+        return x, y, ship.prev_angle + turn * alpha
+
+    def draw_particles(self, screen, particles):
+        n = particles.count
+        if n == 0:
+            return
+        drawn = self.drawn
+        pos = particles.pos[:n]
+        if self.alpha < 1:
+            pos = pos + particles.vel[:n] * (self.alpha - 1)
+        sizes = particles.size[:n]
+        colors = particles.color[:n]
+        pos, visible = self.points_to_screen(pos, 10)
+        if visible is not None:
+            pos, sizes, colors = pos[visible], sizes[visible], colors[visible]
+        points = pos.astype(int).tolist()
+        for (x, y), size, color in zip(points, sizes.tolist(), colors.tolist()):
+            drawn.append(pygame.draw.circle(screen, color, (x, y), size))
+
+    def draw_powerup(self, screen, powerup):
+        pos = self.to_screen(powerup.x, powerup.y, powerup.radius)
+        if pos is None:
             return
+        x, y = pos
+        rect = pygame.draw.circle(screen, powerup.color, (int(x), int(y)), powerup.radius)
+
+        if powerup.type == 'shield':
+            pygame.draw.circle(screen, WHITE, (int(x), int(y)), 8, 2)
+        elif powerup.type == 'triple_shot':
+            pygame.draw.line(screen, WHITE, (x-5, y), (x+5, y), 2)
+            pygame.draw.line(screen, WHITE, (x-5, y-5), (x+5, y+5), 2)
+            pygame.draw.line(screen, WHITE, (x-5, y+5), (x+5, y-5), 2)
+        elif powerup.type == 'rapid_fire':
+            pygame.draw.line(screen, WHITE, (x-5, y), (x+5, y), 2)
+            pygame.draw.line(screen, WHITE, (x, y-5), (x, y+5), 2)
+        self.drawn.append(rect)
+
+    def draw_asteroid(self, screen, asteroid):
+        alpha = self.alpha
+        if alpha >= 1:
+            x, y, rotation = asteroid.x, asteroid.y, None
+        else:
+            x = lerp_wrapped(asteroid.prev_x, asteroid.x, alpha, self.world[0])
+            y = lerp_wrapped(asteroid.prev_y, asteroid.y, alpha, self.world[1])
+            rotation = asteroid.rotation + asteroid.rotation_speed * (alpha - 1)
+        # Outlines reach out to 1.3 times the radius
+        pos = self.to_screen(x, y, asteroid.radius * 1.3 + 1)
+        if pos is None:
+            return
+        x, y = pos
+        sprite = self.asteroid_sprites.get(asteroid, rotation)
+        self.drawn.append(screen.blit(sprite, sprite.get_rect(center=(int(x), int(y)))))
 
-        if left_pressed:
-            self.angle -= 5
-        if right_pressed:
-            self.angle += 5
-        if up_pressed:
-            rad = math.radians(self.angle)
-            self.dx += 0.2 * math.cos(rad)
-            self.dy += 0.2 * math.sin(rad)
-
-            if random.random() < 0.3:
-                thrust_rad = math.radians(self.angle + 180)
-                offset_x = -10 * math.cos(rad)
-                offset_y = -10 * math.sin(rad)
-                color = random.choice([YELLOW, RED])
-                self.thrust_particles.append(
-                    Particle(self.x + offset_x, self.y + offset_y, color)
-                )
-
-        self.dx *= 0.98
-        self.dy *= 0.98
-
-        speed = math.hypot(self.dx, self.dy)
-        if speed > self.max_speed:
-            self.dx = self.dx / speed * self.max_speed
-            self.dy = self.dy / speed * self.max_speed
-
-        self.x += self.dx
-        self.y += self.dy
-
-        if self.x < 0:
-            self.x = screen_width
-        elif self.x > screen_width:
-            self.x = 0
-        if self.y < 0:
-            self.y = screen_height
-        elif self.y > screen_height:
-            self.y = 0
-
-        self.angle %= 360
-        if self.fire_cooldown > 0:
-            self.fire_cooldown -= 1
-        if self.invulnerable_timer > 0:
-            self.invulnerable_timer -= 1
-        if self.shield > 0:
-            self.shield -= 1
-        if self.rapid_fire > 0:
-            self.rapid_fire -= 1
-        if self.triple_shot > 0:
-            self.triple_shot -= 1
-
-        for particle in self.thrust_particles[:]:
-            particle.update()
-            if particle.lifetime <= 0:
-                self.thrust_particles.remove(particle)
-
-    def draw(self, screen):
-        if self.respawn_timer > 0:
+    def draw_spaceship(self, screen, ship):
+        if ship.respawn_timer > 0:
+            return
+        drawn = self.drawn
+        x, y, ship_angle = self.ship_pose(ship)
+        pos = self.to_screen(x, y, 40)
+        if pos is None:
             return
+        x, y = pos
+        # Drawn headings snap to whole degrees, the ones the tables cover
+        heading = round(ship_angle) % 360
 
-        if up_pressed:
-            rad = math.radians(self.angle)
+        if ship.thrusting and self.thruster_flicker:
+            base_x = x - 15 * COS[heading + TRIG_OFFSET]
+            base_y = y - 15 * SIN[heading + TRIG_OFFSET]
             thruster_points = []
             for i in range(3):
-                angle = self.angle + 180 + random.randint(-20, 20)
+                angle = (heading + 180 + random.randint(-20, 20)) % 360 + TRIG_OFFSET
                 length = random.randint(10, 20)
-                rad_p = math.radians(angle)
-                tx = -15 * math.cos(rad) - length * math.cos(rad_p)
-                ty = -15 * math.sin(rad) - length * math.sin(rad_p)
-                thruster_points.append((self.x + tx, self.y + ty))
-            pygame.draw.polygon(screen, YELLOW, thruster_points)
-
-        for particle in self.thrust_particles:
-            particle.draw(screen)
-
-        rad = math.radians(self.angle)
-        rotated_points = []
-        for px, py in self.points:
-            rx = px * math.cos(rad) - py * math.sin(rad)
-            ry = px * math.sin(rad) + py * math.cos(rad)
-            rotated_points.append((self.x + rx, self.y + ry))
-
-        if self.invulnerable_timer > 0 and self.invulnerable_timer % 10 >= 5:
-            pass
-        else:
-            pygame.draw.polygon(screen, WHITE, rotated_points)
-
-        if self.shield > 0:
-            shield_intensity = min(255, int(255 * self.shield_strength / 100))
-            shield_color = (0, shield_intensity, 255)
-            pygame.draw.circle(screen, shield_color, (int(self.x), int(self.y)), 25, 2)
-
-        power_y = self.y - 30
-        if self.rapid_fire > 0:
-            txt = font_small.render("RF", True, YELLOW)
-            screen.blit(txt, (self.x - 20, power_y))
-        if self.triple_shot > 0:
-            txt = font_small.render("TS", True, (255, 105, 180))
-            screen.blit(txt, (self.x + 5, power_y))
-
-    def fire(self, bullets):
-        if self.respawn_timer > 0:
-            return
+                thruster_points.append((base_x - length * COS[angle],
+                                        base_y - length * SIN[angle]))
+            drawn.append(pygame.draw.polygon(screen, YELLOW, thruster_points))
 
-        if self.fire_cooldown <= 0:
-            rad = math.radians(self.angle)
-            tip_x = self.x + 20 * math.cos(rad)
-            tip_y = self.y + 20 * math.sin(rad)
+        self.draw_particles(screen, ship.thrust_particles)
 
-            if self.triple_shot > 0:
-                bullets.append(Bullet(tip_x, tip_y, self.angle))
-                bullets.append(Bullet(tip_x, tip_y, self.angle - 15))
-                bullets.append(Bullet(tip_x, tip_y, self.angle + 15))
-            else:
-                bullets.append(Bullet(tip_x, tip_y, self.angle))
+        if ship.points is SHIP_HULL:
+            hull = self.ship_hulls[heading]
+        else:
+            hull = rotate_points(ship.points, heading)
+        rotated_points = [(x + rx, y + ry) for rx, ry in hull]
 
-            if self.rapid_fire > 0:
-                self.fire_cooldown = 5
-            else:
-                self.fire_cooldown = 15
-
-            try:
-                pygame.mixer.Sound.play(shoot_sound)
-            except:
-                pass
-
-    def hit(self):
-        if self.respawn_timer > 0 or self.invulnerable_timer > 0:
-            return False
-
-        if self.shield > 0:
-            self.shield_strength -= 0
-            if self.shield_strength <= 0:
-                self.shield = 0
-            return False
-
-        self.lives -= 1
-        if self.lives > 0:
-            self.respawn_timer = 120  # 2 seconds
-            self.invulnerable_timer = 180  # 3 seconds of invulnerability after respawn
-        return True
-
-    def respawn(self):
-        self.x = screen_width // 2
-        self.y = screen_height // 2
-        self.dx = 0
-        self.dy = 0
-        self.angle = 0
-
-    def activate_powerup(self, powerup_type):
-        if powerup_type == 'shield':
-            self.shield = 600  # 10 seconds
-            self.shield_strength = 100
-        elif powerup_type == 'triple_shot':
-            self.triple_shot = 300  # 5 seconds
-        elif powerup_type == 'rapid_fire':
-            self.rapid_fire = 300  # 5 seconds
-
-class Bullet:
-    def __init__(self, x, y, angle):
-        self.x = x
-        self.y = y
-        speed = 10
-        rad = math.radians(angle)
-        self.dx = speed * math.cos(rad)
-        self.dy = speed * math.sin(rad)
-        self.lifetime = 60  # Disappears after 60 frames
-        self.trail = []
-
-    def update(self):
-        self.trail.append((self.x, self.y))
-        if len(self.trail) > 5:
-            self.trail.pop(0)
-
-        self.x += self.dx
-        self.y += self.dy
-        self.lifetime -= 1
-        
-        if self.x < 0:
-            self.x = screen_width
-        elif self.x > screen_width:
-            self.x = 0
-        if self.y < 0:
-            self.y = screen_height
-        elif self.y > screen_height:
-            self.y = 0
-
-    def draw(self, screen):
-        for i, (tx, ty) in enumerate(self.trail):
-            alpha = int(255 * i / len(self.trail))
-            radius = 1 + i / 2
-            trail_color = (alpha, alpha, 255)
-            pygame.draw.circle(screen, trail_color, (int(tx), int(ty)), int(radius))
-
-        pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), 2)
-
-class Game:
-    def __init__(self):
-        self.reset()
-
-    def reset(self):
-        self.spaceship = Spaceship(screen_width // 2, screen_height // 2)
-        self.asteroids = []
-        self.bullets = []
-        self.particles = []
-        self.powerups = []
-        self.score = 0
-        self.level = 1
-        self.state = "start"
-        self.level_timer = 0
-        self.message = ""
-        self.message_timer = 0
-
-    def start_level(self):
-        self.asteroids = []
-        for _ in range(2 + self.level):
-            x = random.choice([random.randint(0, 100), random.randint(700, 800)])
-            y = random.choice([random.randint(0, 100), random.randint(500, 600)])
-            self.asteroids.append(Asteroid(LARGE, x, y))
-        for _ in range(self.level):
-            x = random.choice([random.randint(0, 100), random.randint(700, 800)])
-            y = random.choice([random.randint(0, 100), random.randint(500, 600)])
-            self.asteroids.append(Asteroid(MEDIUM, x, y))
-        self.state = "playing"
-
-    def show_message(self, text, duration=120):
-        self.message = text
-        self.message_timer = duration
-
-    def update(self):
-        if self.message_timer > 0:
-            self.message_timer -= 1
-
-        if self.state == "start":
+        if ship.invulnerable_timer > 0 and ship.invulnerable_timer % 10 >= 5:
             pass
-        elif self.state == "level_complete":
-            self.level_timer -= 1
-            if self.level_timer <= 0:
-                self.level += 1
-                self.start_level()
-                self.show_message(f"Level {self.level}")
-                if game.spaceship.lives <= 996:
-                    game.spaceship.lives += 3
-                try:
-                    pygame.mixer.Sound.play(level_up_sound)
-                except:
-                    pass
-        elif self.state == "game_over":
-            pass
-        elif self.state == "playing":
-            if self.spaceship.respawn_timer <= 0:
-                self.spaceship.update()
-
-                if len(self.asteroids) == 0:
-                    self.state = "level_complete"
-                    self.level_timer = 120  # 2 seconds
-                    self.show_message("Level Complete!")
-            else:
-                self.spaceship.respawn_timer -= 1
-                if self.spaceship.respawn_timer == 0:
-                    self.spaceship.respawn()
-
-            for asteroid in self.asteroids:
-                asteroid.update()
-
-            for bullet in self.bullets[:]:
-                bullet.update()
-                if bullet.lifetime <= 0:
-                    self.bullets.remove(bullet)
-
-            for particle in self.particles[:]:
-                particle.update()
-                if particle.lifetime <= 0:
-                    self.particles.remove(particle)
-
-            for powerup in self.powerups[:]:
-                powerup.update()
-                if powerup.lifetime <= 0:
-                    self.powerups.remove(powerup)
-
-            self.check_collisions()
-
-            if len(self.powerups) < 1 and random.random() < 0.001:
-                self.powerups.append(
-                    Powerup(random.randint(50, screen_width-50),
-                           random.randint(50, screen_height-50))
-                )
-
-    def check_collisions(self):
-        asteroids_to_add = []
-
-        for bullet in self.bullets[:]:
-            hit = False
-            for asteroid in self.asteroids[:]:
-                dist = math.hypot(bullet.x - asteroid.x, bullet.y - asteroid.y)
-                if dist < asteroid.radius:
-
-                    for _ in range(10):
-                        self.particles.append(
-                            Particle(asteroid.x, asteroid.y, asteroid.color)
-                        )
-
-                    asteroid.hp -= 1
-                    self.score += 10
-                    hit = True
-
-                    if asteroid.hp <= 0:
-                        self.score += asteroid.score_value
-                        try:
-                            pygame.mixer.Sound.play(explosion_sound)
-                        except:
-                            pass
-
-                        if asteroid.size == LARGE:
-                            for _ in range(2):
-                                asteroids_to_add.append(
-                                    Asteroid(MEDIUM, asteroid.x, asteroid.y)
-                                )
-                        elif asteroid.size == MEDIUM:
-                            for _ in range(2):
-                                asteroids_to_add.append(
-                                    Asteroid(SMALL, asteroid.x, asteroid.y)
-                                )
-
-                        for _ in range(20):
-                            self.particles.append(
-                                Particle(asteroid.x, asteroid.y, asteroid.color)
-                            )
-                        
-                        if random.random() < 0.2:
-                            self.powerups.append(
-                                Powerup(asteroid.x, asteroid.y)
-                            )
-
-                        self.asteroids.remove(asteroid)
-                    break
-
-            if hit and bullet in self.bullets:
-                self.bullets.remove(bullet)
-
-        self.asteroids.extend(asteroids_to_add)
-
-        if self.spaceship.respawn_timer <= 0:
-            for asteroid in self.asteroids:
-                dist = math.hypot(self.spaceship.x - asteroid.x,
-                                 self.spaceship.y - asteroid.y)
-                if dist < asteroid.radius + 15:
-                    if self.spaceship.hit():
-
-                        for _ in range(30):
-                            color = random.choice([WHITE, YELLOW, RED])
-                            self.particles.append(
-                                Particle(self.spaceship.x, self.spaceship.y, color)
-                            )
-                        try:
-                            explosion_sound()
-                        except:
-                            pass
-
-                        if self.spaceship.lives <= 0:
-                            self.state = "game_over"
-                            self.show_message("Game Over", 300)
-                    break
-
-        for powerup in self.powerups[:]:
-            dist = math.hypot(self.spaceship.x - powerup.x,
-                             self.spaceship.y - powerup.y)
-            if dist < powerup.radius + 15:
-                self.spaceship.activate_powerup(powerup.type)
-                self.powerups.remove(powerup)
-                self.show_message(f"{powerup.type.replace('_', ' ').title()} activated!")
-
-    def draw(self, screen):
-        screen.fill(BLACK)
-        for x, y, brightness in stars:
-            size = 1 if brightness < 0.5 else 2
-            color = (int(255 * brightness),
-                    int(255 * brightness),
-                    int(255 * brightness))
-            pygame.draw.circle(screen, color, (int(x), int(y)), size)
-
-        for asteroid in self.asteroids:
-            asteroid.draw(screen)
-
-        for bullet in self.bullets:
-            bullet.draw(screen)
-
-        for particle in self.particles:
-            particle.draw(screen)
-
-        for powerup in self.powerups:
-            powerup.draw(screen)
-
-        if self.state != "game_over":
-            self.spaceship.draw(screen)
-
-        self.draw_ui(screen)
-
-    def draw_ui(self, screen):
-        score_text = font_medium.render(f"Score: {self.score}", True, WHITE)
-        screen.blit(score_text, (10, 10))
-
-        level_text = font_medium.render(f"Level: {self.level}", True, WHITE)
-        screen.blit(level_text, (10, 40))
-
-        lives_text = font_medium.render(f"Lives: {self.spaceship.lives}", True, WHITE)
-        screen.blit(lives_text, (screen_width - 100, 10))
+        else:
+            drawn.append(pygame.draw.polygon(screen, WHITE, rotated_points))
 
-        if self.message and self.message_timer > 0:
-            text = font_large.render(self.message, True, WHITE)
+        if ship.shield > 0:
+            shield_intensity = min(255, int(255 * ship.shield_strength / 100))
+            shield_color = (0, shield_intensity, 255)
+            drawn.append(pygame.draw.circle(screen, shield_color,
+                                            (int(x), int(y)), 25, 2))
+
+        power_y = y - 30
+        if ship.rapid_fire > 0:
+            txt = self.text.render(font_small, "RF", YELLOW, static=True)
+            drawn.append(screen.blit(txt, (x - 20, power_y)))
+        if ship.triple_shot > 0:
+            txt = self.text.render(font_small, "TS", (255, 105, 180), static=True)
+            drawn.append(screen.blit(txt, (x + 5, power_y)))
+
+    def draw_bullets(self, screen, bullets):
+        n = bullets.count
+        if n == 0:
+            return
+        lengths = np.minimum(bullets.trail_len[:n], self.trail_length)
+        # Ring slots in oldest-first order for every bullet
+        slots = (bullets.trail_head[:n, None] - lengths[:, None]
+                 + np.arange(TRAIL_LENGTH)) % TRAIL_LENGTH
+        trails = bullets.trail[np.arange(n)[:, None], slots]
+        heads = bullets.pos[:n]
+        if self.alpha < 1:
+            # Bullets fly straight, so back the whole trail up along it
+            offset = bullets.vel[:n] * (self.alpha - 1)
+            trails = trails + offset[:, None]
+            heads = heads + offset
+        if self.camera is not None:
+            # Trails move with their bullet, which a 50px margin covers
+            screen_heads, visible = self.points_to_screen(heads, 50)
+            trails = (trails + (screen_heads - heads)[:, None])[visible]
+            heads = screen_heads[visible]
+            lengths = lengths[visible]
+        trails = trails.astype(int).tolist()
+        heads = heads.astype(int).tolist()
+
+        stamps = self.trail_stamps
+        head_stamp, head_radius = self.bullet_stamp
+        blits = []
+        for trail, length, (x, y) in zip(trails, lengths.tolist(), heads):
+            row = stamps[length]
+            for i in range(length):
+                stamp, radius = row[i]
+                tx, ty = trail[i]
+                blits.append((stamp, (tx - radius, ty - radius)))
+            blits.append((head_stamp, (x - head_radius, y - head_radius)))
+        self.drawn.extend(screen.blits(blits))
+
+    def blit_text(self, screen, surface, dest):
+        self.drawn.append(screen.blit(surface, dest))
+
+    def draw_ui(self, screen, game):
+        score_text = self.text.render(font_medium, f"Score: {game.score}", WHITE)
+        self.blit_text(screen, score_text, (10, 10))
+
+        level_text = self.text.render(font_medium, f"Level: {game.level}", WHITE)
+        self.blit_text(screen, level_text, (10, 40))
+
+        for player, ship in enumerate(game.ships):
+            label = f"P{player + 1}: {ship.lives}" if game.players > 1 else f"Lives: {ship.lives}"
+            lives_text = self.text.render(font_medium, label, WHITE)
+            self.blit_text(screen, lives_text, (screen_width - 100, 10 + player * 30))
+
+        if game.message and game.message_timer > 0:
+            text = self.text.render(font_large, game.message, WHITE)
             text_rect = text.get_rect(center=(screen_width//2, screen_height//2))
-            screen.blit(text, text_rect)
+            self.blit_text(screen, text, text_rect)
 
-        if self.state == "start":
-            title = font_large.render("AsteroidGame", True, WHITE)
+        if game.state == "start":
+            title = self.text.render(font_large, "AsteroidGame", WHITE, static=True)
             title_rect = title.get_rect(center=(screen_width//2, screen_height//2 - 50))
-            screen.blit(title, title_rect)
+            self.blit_text(screen, title, title_rect)
 
-            instruction = font_medium.render("Press SPACE to start", True, WHITE)
+            instruction = self.text.render(font_medium, "Press SPACE to start", WHITE, static=True)
             instruction_rect = instruction.get_rect(center=(screen_width//2, screen_height//2 + 50))
-            screen.blit(instruction, instruction_rect)
+            self.blit_text(screen, instruction, instruction_rect)
 
-            controls = font_small.render("Arrow keys to move, E to shoot", True, WHITE)
+            controls = self.text.render(font_small, "Arrow keys to move, E to shoot", WHITE, static=True)
             controls_rect = controls.get_rect(center=(screen_width//2, screen_height//2 + 100))
-            screen.blit(controls, controls_rect)
+            self.blit_text(screen, controls, controls_rect)
 
-        elif self.state == "game_over":
-            if self.message_timer <= 0:
-                gameover = font_large.render("GAME OVER", True, RED)
+        elif game.state == "game_over":
+            if game.message_timer <= 0:
+                gameover = self.text.render(font_large, "GAME OVER", RED, static=True)
                 gameover_rect = gameover.get_rect(center=(screen_width//2, screen_height//2 - 50))
-                screen.blit(gameover, gameover_rect)
+                self.blit_text(screen, gameover, gameover_rect)
 
-                score = font_medium.render(f"Final Score: {self.score}", True, WHITE)
+                score = self.text.render(font_medium, f"Final Score: {game.score}", WHITE)
                 score_rect = score.get_rect(center=(screen_width//2, screen_height//2))
-                screen.blit(score, score_rect)
+                self.blit_text(screen, score, score_rect)
 
-                restart = font_medium.render("Press SPACE to restart", True, WHITE)
+                restart = self.text.render(font_medium, "Press SPACE to restart", WHITE, static=True)
                 restart_rect = restart.get_rect(center=(screen_width//2, screen_height//2 + 50))
-                screen.blit(restart, restart_rect)
-
-game = Game()
-
-left_pressed = False
-right_pressed = False
-up_pressed = False
-
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                running = False
-            elif event.key == pygame.K_LEFT:
-                left_pressed = True
-            elif event.key == pygame.K_RIGHT:
-                right_pressed = True
-            elif event.key == pygame.K_UP:
-                up_pressed = True
-                try:
-                    pygame.mixer.Sound.play(thrust_sound)
-                except:
-                    pass
-            elif event.key == pygame.K_SPACE:
-                if game.state == "start":
-                    game.start_level()
-                elif game.state == "game_over":
-                    game.reset()
-            elif event.key == pygame.K_e:
-                if game.state == "playing":
-                    game.spaceship.fire(game.bullets)
-            elif event.key == pygame.K_c:
-                game.spaceship.lives = 999
-        elif event.type == pygame.KEYUP:
-            if event.key == pygame.K_LEFT:
-                left_pressed = False
-            elif event.key == pygame.K_RIGHT:
-                right_pressed = False
-            elif event.key == pygame.K_UP:
-                up_pressed = False
-
-    game.update()
-    game.draw(screen)
-    pygame.display.flip()
-
-    clock.tick(60)
-
-pygame.quit()
+                self.blit_text(screen, restart, restart_rect)
+
+    def draw_profiler(self, screen):
+        # The numbers are re-rendered twice a second so they stay readable
+        # and don't churn the text cache.
+        self.profiler_age -= 1
+        if self.profiler_age <= 0:
+            self.profiler_age = 30
+            self.profiler_lines = [f"{'ms':<18}{'p50':>7}{'p95':>7}{'p99':>7}{'max':>7}"]
+            for name, stat in self.profiler.stats().items():
+                self.profiler_lines.append(
+                    f"{name:<18}{stat['p50']:7.2f}{stat['p95']:7.2f}"
+                    f"{stat['p99']:7.2f}{stat['max']:7.2f}")
+            counts = [f"{name} {value}" for name, value in self.profiler.peak_counts().items()]
+            for i in range(0, len(counts), 4):
+                self.profiler_lines.append("  ".join(counts[i:i + 4]))
+
+        y = 70
+        for line in self.profiler_lines:
+            surface = self.text.render(font_mono, line, GREEN)
+            self.blit_text(screen, surface, (10, y))
+            y += surface.get_height()
+
+class Controls:
+    # Turns pygame key events into one Input per tick
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.running = True
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+
+    def poll(self):
+        fire_pressed = False
+        start_pressed = False
+        cheat_pressed = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                elif event.key == pygame.K_LEFT:
+                    self.left_pressed = True
+                elif event.key == pygame.K_RIGHT:
+                    self.right_pressed = True
+                elif event.key == pygame.K_UP:
+                    self.up_pressed = True
+                elif event.key == pygame.K_SPACE:
+                    start_pressed = True
+                elif event.key == pygame.K_e:
+                    fire_pressed = True
+                elif event.key == pygame.K_c:
+                    cheat_pressed = True
+                elif event.key == pygame.K_F3:
+                    self.renderer.show_profiler = not self.renderer.show_profiler
+            elif event.type == pygame.KEYUP:
+                if event.key == pygame.K_LEFT:
+                    self.left_pressed = False
+                elif event.key == pygame.K_RIGHT:
+                    self.right_pressed = False
+                elif event.key == pygame.K_UP:
+                    self.up_pressed = False
+
+        return Input(self.left_pressed, self.right_pressed, self.up_pressed,
+                     fire_pressed, start_pressed, cheat_pressed)
+
+# Ticks one frame may run to catch up before the game slows down instead
+MAX_TICKS_PER_FRAME = 5
+
+class FramePacer:
+    # Frames are due at fixed monotonic deadlines. Sleeping until the next
+    # deadline lets background tasks run; a late frame starts the next one
+    # right away rather than waiting out a whole interval.
+    def __init__(self, fps=60):
+        self.interval = 1 / fps
+        self.deadline = time.monotonic()
+        self.late_frames = 0
+
+    async def wait(self):
+        self.deadline += self.interval
+        delay = self.deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            return
+        self.late_frames += 1
+        if delay < -self.interval:
+            # Too far behind to catch up, start counting again from now
+            self.deadline = time.monotonic()
+        await asyncio.sleep(0)
+
+# Detail tiers from full quality down: particles spawned per explosion (as
+# a fraction), bullet trail dots, thruster flame, starfield layers drawn
+QUALITY_TIERS = [
+    (1.0, TRAIL_LENGTH, True, None),
+    (0.5, 3, True, None),
+    (0.5, 2, False, 2),
+    (0.25, 0, False, 1),
+]
+
+class QualityGovernor:
+    # Steps detail down after a few frames over budget and back up after a
+    # couple of seconds with plenty of headroom. The gap between the two
+    # thresholds keeps it from flapping between neighbouring tiers.
+    def __init__(self, fps=60, tier=0, adaptive=True, degrade_after=3, restore_after=120):
+        self.budget = 1 / fps
+        self.tier = tier
+        self.adaptive = adaptive
+        self.degrade_after = degrade_after
+        self.restore_after = restore_after
+        self.over = 0
+        self.under = 0
+        self.changes = 0
+
+    def end_frame(self, seconds):
+        # seconds is the frame's work, not counting the wait for the next one
+        if not self.adaptive:
+            return
+        if seconds > self.budget * 0.9:
+            self.over += 1
+            self.under = 0
+        elif seconds < self.budget * 0.5:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= self.degrade_after and self.tier < len(QUALITY_TIERS) - 1:
+            self.set_tier(self.tier + 1)
+        elif self.under >= self.restore_after and self.tier > 0:
+            self.set_tier(self.tier - 1)
+
+    def set_tier(self, tier):
+        self.tier = tier
+        self.over = self.under = 0
+        self.changes += 1
+
+    def apply(self, renderer, game):
+        density, trail_length, thruster_flicker, star_layers = QUALITY_TIERS[self.tier]
+        game.particles.density = density
+        renderer.trail_length = trail_length
+        renderer.thruster_flicker = thruster_flicker
+        renderer.star_layers = star_layers
+
+class BackgroundIO:
+    # Runs blocking work (saves, uploads) on worker threads so it never
+    # holds up a frame
+    def __init__(self):
+        self.tasks = set()
+
+    def run(self, func, *args):
+        task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        self.tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"ERROR: background task failed: {task.exception()!r}")
+
+    async def drain(self):
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+async def run(args):
+    game = Game(args.seed, *args.world)
+    renderer = Renderer(game.seed, args.stars, args.star_layers, args.dirty_rects)
+    recorder = Recorder(game.seed) if args.record else None
+    profiler = FrameProfiler()
+    game.profiler = profiler
+    renderer.profiler = profiler
+    loop = asyncio.get_running_loop()
+    io = BackgroundIO()
+    pacer = FramePacer(args.fps)
+    if args.quality == 'auto':
+        governor = QualityGovernor(args.fps)
+    else:
+        governor = QualityGovernor(args.fps, int(args.quality), adaptive=False)
+
+    # The simulation always steps at TICK_RATE; frames draw however many
+    # ticks of real time have passed and interpolate into the next one.
+    tick = 1 / TICK_RATE
+    max_lag = MAX_TICKS_PER_FRAME * tick
+    accumulator = 0.0
+    previous = time.monotonic()
+    presses = 0
+
+    controls = Controls(renderer)
+    while controls.running:
+        frame_start = time.perf_counter()
+        governor.apply(renderer, game)
+        bits = controls.poll().to_bits()
+        # Key presses wait for the next tick rather than getting lost
+        presses |= bits & PRESS_BITS
+        now = time.monotonic()
+        accumulator = min(accumulator + now - previous, max_lag)
+        previous = now
+
+        while accumulator >= tick:
+            inputs = Input.from_bits(bits & HELD_BITS | presses)
+            presses = 0
+            with profiler.section('update'):
+                game.update(inputs)
+            if recorder:
+                recorder.record(inputs, game)
+            sounds.queue(game.events)
+            accumulator -= tick
+        # Sounds start once the frame has yielded, not in the middle of it
+        loop.call_soon(sounds.flush)
+
+        profiler.count('asteroids', len(game.asteroids) + len(game.dormant_asteroids))
+        profiler.count('bullets', len(game.bullets))
+        profiler.count('particles', len(game.particles) + len(game.spaceship.thrust_particles))
+        profiler.count('powerups', len(game.powerups))
+        profiler.count('late_frames', pacer.late_frames)
+        profiler.count('quality_tier', governor.tier)
+        profiler.count('quality_changes', governor.changes)
+        profiler.count('sounds_coalesced', sounds.coalesced)
+        profiler.count('voices_stolen', sounds.stolen)
+        for name, value in game.pool_stats().items():
+            profiler.count(name, value)
+
+        with profiler.section('draw'):
+            rects = renderer.draw(screen, game, accumulator / tick)
+        with profiler.section('present'):
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+
+        governor.end_frame(time.perf_counter() - frame_start)
+        await pacer.wait()
+        profiler.end_frame()
+
+    if recorder:
+        io.run(recorder.save, args.record)
+    if args.profile_out:
+        io.run(profiler.export, args.profile_out)
+    await io.drain()
+
+def parse_size(text):
+    width, _, height = text.lower().partition('x')
+    size = int(width), int(height)
+    if size[0] < screen_width or size[1] < screen_height:
+        raise argparse.ArgumentTypeError(f"must be at least {screen_width}x{screen_height}")
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description="AsteroidGame")
+    parser.add_argument('--seed', type=parse_seed, help="seed for a reproducible run")
+    parser.add_argument('--record', metavar='PATH',
+                        help="save the session's inputs for replay.py")
+    parser.add_argument('--stars', type=int, default=100,
+                        help="number of background stars")
+    parser.add_argument('--star-layers', type=int, default=1,
+                        help="parallax layers the stars are spread over")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="only redraw the screen areas that changed")
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help="write frame timings to a .csv or .json file on exit")
+    parser.add_argument('--fps', type=int, default=60,
+                        help="frames drawn per second, independent of the game speed")
+    parser.add_argument('--quality', default='auto',
+                        choices=['auto'] + [str(tier) for tier in range(len(QUALITY_TIERS))],
+                        help="detail tier from 0 (full); auto lowers it while frames run late")
+    parser.add_argument('--world', type=parse_size, default=(screen_width, screen_height),
+                        metavar='WIDTHxHEIGHT', help="size of the playfield in pixels")
+    args = parser.parse_args()
+    if args.record and args.world != (screen_width, screen_height):
+        parser.error("recordings only replay on the default world size")
+
+    asyncio.run(run(args))
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
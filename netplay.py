@@ -0,0 +1,261 @@
+import argparse
+import heapq
+import itertools
+import random
+import socket
+import struct
+import time
+
+from simulation import Game, Input, HELD_BITS, PRESS_BITS, parse_seed
+
+# Peers only ever exchange input bitmasks. Each packet carries every local
+# input the other side has not acknowledged yet, so a lost packet is
+# covered by the next one.
+MAGIC = b'AGNP'
+_PACKET = struct.Struct('<4siiB')  # magic, first frame, ack, input count
+MAX_INPUTS_PER_PACKET = 64
+
+class UdpTransport:
+    def __init__(self, port, peer, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('', port))
+        self.sock.setblocking(False)
+        self.peer = peer
+        # Test shim: outgoing packets can be delayed (seconds) and dropped
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.pending = []
+        self.sequence = itertools.count()
+
+    def send(self, payload):
+        if self.loss and self.rng.random() < self.loss:
+            return
+        if not self.latency and not self.jitter:
+            self._send_now(payload)
+            return
+        due = time.monotonic() + self.latency + self.rng.uniform(0, self.jitter)
+        heapq.heappush(self.pending, (due, next(self.sequence), payload))
+
+    def receive(self):
+        now = time.monotonic()
+        while self.pending and self.pending[0][0] <= now:
+            self._send_now(heapq.heappop(self.pending)[2])
+
+        packets = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except BlockingIOError:
+                break
+            except ConnectionResetError:
+                # Windows reports an earlier send to a closed port here
+                continue
+            packets.append(data)
+        return packets
+
+    def _send_now(self, payload):
+        try:
+            self.sock.sendto(payload, self.peer)
+        except OSError:
+            pass  # the peer is not up yet, the next packet repeats this one
+
+    def close(self):
+        self.sock.close()
+
+class RollbackSession:
+    def __init__(self, game, player, transport, input_delay=1, max_rollback=12):
+        self.game = game
+        self.player = player
+        self.transport = transport
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+        self.frame = 0  # next frame to simulate
+
+        # Inputs by frame. Frames inside the input delay are empty for both.
+        self.local_inputs = {frame: 0 for frame in range(input_delay)}
+        self.last_local = input_delay - 1
+        self.remote_inputs = {frame: 0 for frame in range(input_delay)}
+        self.predicted = {}
+        self.remote_confirmed = input_delay - 1  # every remote input up to here is in
+        self.remote_ack = input_delay - 1  # the peer has every local input up to here
+        # State before each frame that may still have to be simulated again
+        self.snapshots = {}
+        self.rollback_frame = None
+
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.stalls = 0
+
+    def advance(self, inputs):
+        # Simulates one frame unless the peer is too far behind to roll
+        # back to, in which case the frame is skipped and False returned.
+        self.poll()
+        if self.frame - self.remote_confirmed > self.max_rollback:
+            self.stalls += 1
+            return False
+        self.last_local = self.frame + self.input_delay
+        self.local_inputs[self.last_local] = inputs.to_bits()
+        self._send()
+        self._simulate(self.frame)
+        self.frame += 1
+        self._prune()
+        return True
+
+    def poll(self):
+        self._receive()
+        self._send()
+        if self.rollback_frame is not None:
+            self._rollback()
+
+    def synced(self):
+        # Both sides have all inputs for every simulated frame
+        last = self.frame - 1
+        return self.remote_confirmed >= last and self.remote_ack >= last
+
+    def _receive(self):
+        for data in self.transport.receive():
+            if len(data) < _PACKET.size:
+                continue
+            magic, first, ack, count = _PACKET.unpack_from(data)
+            if magic != MAGIC:
+                continue
+            if ack > self.remote_ack:
+                self.remote_ack = ack
+            for frame, bits in enumerate(data[_PACKET.size:_PACKET.size + count], first):
+                if frame <= self.remote_confirmed or frame in self.remote_inputs:
+                    continue
+                self.remote_inputs[frame] = bits
+                predicted = self.predicted.pop(frame, None)
+                if predicted is not None and predicted != bits:
+                    if self.rollback_frame is None or frame < self.rollback_frame:
+                        self.rollback_frame = frame
+        while self.remote_confirmed + 1 in self.remote_inputs:
+            self.remote_confirmed += 1
+
+    def _send(self):
+        first = self.remote_ack + 1
+        last = min(self.last_local, first + MAX_INPUTS_PER_PACKET - 1)
+        inputs = bytes(self.local_inputs[frame] for frame in range(first, last + 1))
+        self.transport.send(_PACKET.pack(MAGIC, first, self.remote_confirmed, len(inputs)) + inputs)
+
+    def _predict(self):
+        # Held keys are predicted to stay held; presses not to happen again
+        return self.remote_inputs[self.remote_confirmed] & HELD_BITS
+
+    def _simulate(self, frame):
+        if frame > self.remote_confirmed:
+            self.snapshots[frame] = self.game.snapshot()
+        remote = self.remote_inputs.get(frame)
+        if remote is None:
+            remote = self.predicted[frame] = self._predict()
+        local = self.local_inputs[frame]
+        bits = (local, remote) if self.player == 0 else (remote, local)
+        self.game.update([Input.from_bits(b) for b in bits])
+
+    def _rollback(self):
+        frame = self.rollback_frame
+        self.rollback_frame = None
+        self.game.restore(self.snapshots[frame])
+        self.rollbacks += 1
+        for resim in range(frame, self.frame):
+            self._simulate(resim)
+            self.resimulated += 1
+        self._prune()
+
+    def _prune(self):
+        # Confirmed frames never roll back; unacknowledged inputs are resent
+        for frame in [f for f in self.snapshots if f <= self.remote_confirmed]:
+            del self.snapshots[frame]
+        oldest = min(self.remote_confirmed, self.remote_ack)
+        for frame in [f for f in self.local_inputs if f < oldest]:
+            del self.local_inputs[frame]
+        for frame in [f for f in self.remote_inputs if f < self.remote_confirmed]:
+            del self.remote_inputs[frame]
+
+def parse_address(text):
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def bot_inputs(player, seed):
+    rng = random.Random(seed * 2 + player)
+    tick = 0
+    while True:
+        yield Input(left=rng.random() < 0.3, right=rng.random() < 0.3,
+                    up=rng.random() < 0.2, fire=rng.random() < 0.3,
+                    start=tick % 600 == 0)
+        tick += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-player AsteroidGame over UDP")
+    parser.add_argument('--player', type=int, choices=[1, 2], required=True)
+    parser.add_argument('--port', type=int, required=True, help="local UDP port")
+    parser.add_argument('--peer', type=parse_address, required=True, metavar='HOST:PORT')
+    parser.add_argument('--seed', type=parse_seed, default=1, help="must match on both peers")
+    parser.add_argument('--input-delay', type=int, default=1, help="frames")
+    parser.add_argument('--max-rollback', type=int, default=12, help="frames")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="simulated one-way delay in ms")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="extra random delay in ms")
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help="fraction of packets to drop")
+    parser.add_argument('--bot', action='store_true',
+                        help="play random inputs without a window")
+    parser.add_argument('--ticks', type=int, default=3600,
+                        help="frames to play with --bot")
+    args = parser.parse_args()
+
+    player = args.player - 1
+    transport = UdpTransport(args.port, args.peer, args.latency / 1000,
+                             args.jitter / 1000, args.loss)
+    game = Game(args.seed, players=2)
+    session = RollbackSession(game, player, transport, args.input_delay, args.max_rollback)
+
+    if args.bot:
+        inputs = bot_inputs(player, args.seed)
+        deadline = time.monotonic()
+        while session.frame < args.ticks:
+            session.advance(next(inputs))
+            deadline += 1 / 60
+            time.sleep(max(0.0, deadline - time.monotonic()))
+        # Wait for the last inputs in both directions so the states agree
+        give_up = time.monotonic() + 5
+        while not session.synced() and time.monotonic() < give_up:
+            session.poll()
+            time.sleep(0.005)
+        linger = time.monotonic() + 0.5
+        while time.monotonic() < linger:
+            session.poll()
+            time.sleep(0.005)
+        print(f"player {args.player}: frame {session.frame}, hash {game.state_hash():016x}, "
+              f"score {game.score}, {session.rollbacks} rollbacks, "
+              f"{session.resimulated} frames resimulated, {session.stalls} stalls")
+        transport.close()
+        return
+
+    import game as frontend
+    renderer = frontend.Renderer(game.seed)
+    controls = frontend.Controls(renderer)
+    presses = 0
+    while controls.running:
+        bits = controls.poll().to_bits()
+        # Key presses wait for a frame the session takes rather than getting
+        # lost while it stalls
+        presses |= bits & PRESS_BITS
+        if session.advance(Input.from_bits(bits & HELD_BITS | presses)):
+            presses = 0
+            frontend.sounds.queue(game.events)
+        rects = renderer.draw(frontend.screen, game)
+        if rects is None:
+            frontend.pygame.display.flip()
+        else:
+            frontend.pygame.display.update(rects)
+        frontend.sounds.flush()
+        frontend.clock.tick(60)
+    transport.close()
+    frontend.pygame.quit()
+
+if __name__ == "__main__":
+    main()
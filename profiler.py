@@ -0,0 +1,107 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))
+    return sorted_values[index]
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed
+
+class FrameProfiler:
+    def __init__(self, window=600):
+        # Section timings (ms) and entity counts for the last `window` frames
+        self.frames = deque(maxlen=window)
+        self.current = {}
+        self.counts = {}
+        self.sections = {}
+        self.order = []
+        self.frame_start = time.perf_counter()
+
+    def section(self, name):
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = _Section(self, name)
+            self.order.append(name)
+        return section
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def end_frame(self):
+        now = time.perf_counter()
+        self.current['frame'] = (now - self.frame_start) * 1000
+        self.frame_start = now
+        self.frames.append((self.current, self.counts))
+        self.current = {}
+        self.counts = {}
+
+    def stats(self):
+        result = {}
+        for name in ['frame'] + self.order:
+            values = sorted(frame.get(name, 0.0) for frame, _ in self.frames)
+            result[name] = {
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': values[-1] if values else 0.0,
+            }
+        return result
+
+    def peak_counts(self):
+        peaks = {}
+        for _, counts in self.frames:
+            for name, value in counts.items():
+                peaks[name] = max(peaks.get(name, 0), value)
+        return peaks
+
+    def export(self, path):
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({
+                    'stats': self.stats(),
+                    'peak_counts': self.peak_counts(),
+                    'frames': [dict(timings, counts=counts)
+                               for timings, counts in self.frames],
+                }, f, indent=2)
+            return
+
+        timing_names = ['frame'] + self.order
+        count_names = sorted({name for _, counts in self.frames for name in counts})
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(timing_names + count_names)
+            for timings, counts in self.frames:
+                writer.writerow([f"{timings.get(name, 0.0):.4f}" for name in timing_names]
+                                + [counts.get(name, 0) for name in count_names])
+
+class NullProfiler:
+    _section = nullcontext()
+
+    def section(self, name):
+        return self._section
+
+    def count(self, name, value):
+        pass
+
+    def end_frame(self):
+        pass
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,109 @@
+import argparse
+import struct
+import sys
+import time
+import zlib
+
+from simulation import Game, Input
+
+# File layout: header, zlib-compressed input bytes (one bitmask per tick),
+# then one 64-bit state hash per checkpoint.
+MAGIC = b'AGRC'
+# Bumped whenever the game rules change, since old inputs no longer
+# reproduce the same game (2: swept bullet collisions, 3: asteroids and
+# powerups swap-removed)
+VERSION = 3
+HEADER = struct.Struct('<4sHQIHI')  # magic, version, seed, ticks, interval, packed size
+
+class DesyncError(Exception):
+    pass
+
+class Recorder:
+    def __init__(self, seed, checkpoint_interval=60):
+        self.seed = seed
+        self.checkpoint_interval = checkpoint_interval
+        self.inputs = bytearray()
+        self.checkpoints = []
+
+    def record(self, inputs, game):
+        self.inputs.append(inputs.to_bits())
+        if len(self.inputs) % self.checkpoint_interval == 0:
+            self.checkpoints.append(game.state_hash())
+
+    def to_bytes(self):
+        packed = zlib.compress(bytes(self.inputs), 9)
+        header = HEADER.pack(MAGIC, VERSION, self.seed, len(self.inputs),
+                             self.checkpoint_interval, len(packed))
+        hashes = struct.pack(f'<{len(self.checkpoints)}Q', *self.checkpoints)
+        return header + packed + hashes
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+class Recording:
+    def __init__(self, seed, inputs, checkpoint_interval, checkpoints):
+        self.seed = seed
+        self.inputs = inputs
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints = checkpoints
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, ticks, interval, size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not an AsteroidGame recording")
+        if version != VERSION:
+            raise ValueError(f"unsupported recording version {version}")
+        offset = HEADER.size
+        inputs = zlib.decompress(data[offset:offset + size])
+        if len(inputs) != ticks:
+            raise ValueError("truncated recording")
+        offset += size
+        count = ticks // interval
+        checkpoints = list(struct.unpack_from(f'<{count}Q', data, offset))
+        return cls(seed, inputs, interval, checkpoints)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+def replay(recording, verify=True):
+    game = Game(recording.seed)
+    interval = recording.checkpoint_interval
+    checkpoint = 0
+    for tick, bits in enumerate(recording.inputs, 1):
+        game.update(Input.from_bits(bits))
+        if verify and tick % interval == 0:
+            expected = recording.checkpoints[checkpoint]
+            actual = game.state_hash()
+            if actual != expected:
+                raise DesyncError(f"state hash mismatch at tick {tick}: "
+                                  f"expected {expected:016x}, got {actual:016x}")
+            checkpoint += 1
+    return game
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded session")
+    parser.add_argument('recording')
+    parser.add_argument('--no-verify', action='store_true',
+                        help="skip state hash checks")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.recording)
+    start = time.perf_counter()
+    try:
+        game = replay(recording, verify=not args.no_verify)
+    except DesyncError as e:
+        print(f"DESYNC: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    ticks = len(recording.inputs)
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / max(elapsed, 1e-9):.0f} ticks/s, "
+          f"{ticks / 60 / max(elapsed, 1e-9):.1f}x real time)")
+    print(f"score {game.score}, level {game.level}, state {game.state}")
+
+if __name__ == "__main__":
+    main()
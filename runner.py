@@ -0,0 +1,109 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import Game, Input, parse_seed
+
+# Policies map (game, tick, rng) to the Input for that tick. They live at
+# module level so worker processes can look them up by name.
+
+def random_policy(game, tick, rng):
+    return Input(left=rng.random() < 0.3, right=rng.random() < 0.3,
+                 up=rng.random() < 0.2, fire=rng.random() < 0.5)
+
+def aim_policy(game, tick, rng):
+    # Turn towards the nearest asteroid and shoot once roughly facing it
+    ship = game.spaceship
+    nearest = None
+    nearest_dist = math.inf
+    for asteroid in game.asteroids:
+        dist = math.hypot(asteroid.x - ship.x, asteroid.y - ship.y)
+        if dist < nearest_dist:
+            nearest = asteroid
+            nearest_dist = dist
+    if nearest is None:
+        return Input()
+
+    target = math.degrees(math.atan2(nearest.y - ship.y, nearest.x - ship.x))
+    diff = (target - ship.angle + 180) % 360 - 180
+    return Input(left=diff < -5, right=diff > 5,
+                 up=nearest_dist > 250 and tick % 4 == 0,
+                 fire=abs(diff) < 15)
+
+POLICIES = {
+    'random': random_policy,
+    'aim': aim_policy,
+}
+
+def run_episode(seed, policy='aim', max_ticks=36000):
+    policy_fn = POLICIES[policy]
+    rng = random.Random(seed)
+    game = Game(seed)
+    game.update(Input(start=True))
+
+    start = time.perf_counter()
+    ticks = 0
+    while game.state != "game_over" and ticks < max_ticks:
+        game.update(policy_fn(game, ticks, rng))
+        ticks += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        'seed': seed,
+        'policy': policy,
+        'score': game.score,
+        'level': game.level,
+        'ticks': ticks,
+        'game_over': game.state == "game_over",
+        'fps': ticks / elapsed if elapsed > 0 else 0.0,
+    }
+
+def run_batch(seeds, policy='aim', max_ticks=36000, workers=None):
+    # Yields each episode's result as soon as its worker finishes
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_episode, seed, policy, max_ticks) for seed in seeds]
+        for future in as_completed(futures):
+            yield future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many seeded games in parallel")
+    parser.add_argument('--episodes', type=int, default=32)
+    parser.add_argument('--seed', type=parse_seed, default=0, help="seed of the first episode")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='aim')
+    parser.add_argument('--max-ticks', type=int, default=36000,
+                        help="cut episodes off after this many ticks")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', metavar='PATH', help="also write results as JSON lines")
+    args = parser.parse_args()
+    if args.episodes < 1:
+        parser.error("--episodes must be at least 1")
+
+    seeds = range(args.seed, args.seed + args.episodes)
+    out = open(args.out, 'w') if args.out else None
+    start = time.perf_counter()
+    total_ticks = 0
+    scores = []
+    try:
+        for result in run_batch(seeds, args.policy, args.max_ticks, args.workers):
+            line = json.dumps(result)
+            print(line, flush=True)
+            if out:
+                out.write(line + '\n')
+            total_ticks += result['ticks']
+            scores.append(result['score'])
+    finally:
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - start
+    ticks_per_second = total_ticks / elapsed if elapsed > 0 else 0.0
+
+    print(f"{len(scores)} episodes, {total_ticks} ticks in {elapsed:.1f}s "
+          f"({ticks_per_second:.0f} ticks/s on {args.workers} workers), "
+          f"mean score {sum(scores) / len(scores):.0f}")
+
+if __name__ == "__main__":
+    main()
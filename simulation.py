@@ -0,0 +1,1263 @@
+import argparse
+import hashlib
+import itertools
+import math
+import random
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from profiler import NULL_PROFILER
+
+screen_width = 800
+screen_height = 600
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+
+POWERUP_TYPES = ['shield', 'triple_shot', 'rapid_fire']
+POWERUP_COLORS = {
+    'shield': (0, 191, 255),      # Deep sky blue
+    'triple_shot': (255, 105, 180), # Hot pink
+    'rapid_fire': (255, 215, 0)     # Gold
+}
+GAME_STATES = ['start', 'playing', 'level_complete', 'game_over']
+
+# Unique id per generated asteroid outline, used by renderers to cache sprites
+_shape_ids = itertools.count()
+
+SMALL = 1
+MEDIUM = 2
+LARGE = 3
+
+# Every speed and timer in the simulation is per tick
+TICK_RATE = 60
+
+# cos/sin of every whole degree, indexed by angle + TRIG_OFFSET so headings
+# a turn or spread past either end of 0..359 still hit the table. Entries
+# come from the same math calls the per-tick code used to make, which
+# keeps results (and recordings) bit-identical.
+TRIG_OFFSET = 360
+COS = [math.cos(math.radians(angle)) for angle in range(-TRIG_OFFSET, 720)]
+SIN = [math.sin(math.radians(angle)) for angle in range(-TRIG_OFFSET, 720)]
+
+SHIP_HULL = [(-10, -10), (20, 0), (-10, 10), (0, 0)]
+
+CELL_SIZE = 120  # Twice the largest asteroid radius
+# Bullet and asteroid pairs needed before collisions go through the grid;
+# with fewer, testing every pair is cheaper than building it
+GRID_MIN_PAIRS = 2048
+
+# Recordings and snapshots store the seed in 64 bits and numpy takes no
+# negative seeds, so seeds run from 0 up to here
+MAX_SEED = (1 << 63) - 1
+
+def parse_seed(text):
+    # argparse type for the --seed options
+    seed = int(text)
+    if not 0 <= seed <= MAX_SEED:
+        raise argparse.ArgumentTypeError(f"must be between 0 and {MAX_SEED}")
+    return seed
+
+# In worlds bigger than the screen, asteroids this far from every ship go
+# dormant: they move DORMANT_INTERVAL ticks at a time, a slice of them per
+# tick, and skip collisions. Bullets fly 600px, so nothing dormant can be
+# hit. They wake again a little closer in than they fell asleep.
+WAKE_RANGE = 900
+SLEEP_RANGE = 1000
+DORMANT_INTERVAL = 8
+
+# Everything the player can do in one tick; start and fire are key presses,
+# the rest are held keys.
+class Input(namedtuple('Input', ['left', 'right', 'up', 'fire', 'start', 'cheat'],
+                       defaults=(False,) * 6)):
+    __slots__ = ()
+
+    def to_bits(self):
+        bits = 0
+        for i, pressed in enumerate(self):
+            if pressed:
+                bits |= 1 << i
+        return bits
+
+    @staticmethod
+    def from_bits(bits):
+        return _INPUTS_BY_BITS[bits & 0x3f]
+
+_INPUTS_BY_BITS = [Input(*(bool(bits >> i & 1) for i in range(6))) for bits in range(64)]
+NO_INPUT = Input()
+HELD_BITS = Input(left=True, right=True, up=True).to_bits()
+PRESS_BITS = Input(fire=True, start=True, cheat=True).to_bits()
+
+class SpatialHash:
+    # Uniform grid of points, rebuilt every tick and searched with bounding
+    # boxes (x0, y0, x1, y1). Cells split the world exactly, so cell indices
+    # wrap with it and a box reaching past one edge finds what is just
+    # inside the opposite one.
+    def __init__(self, cell_size, width, height):
+        self.cols = max(1, int(width // cell_size))
+        self.rows = max(1, int(height // cell_size))
+        self.cell = np.array([width / self.cols, height / self.rows] * 2)
+        self.offsets = {}  # cell offsets covering each box span, by span
+        # Each item's cell, sorted, and the items in that order
+        self.cells = np.zeros(0, dtype=np.int64)
+        self.keys = np.zeros(0, dtype=np.int64)
+
+    def _cover(self, boxes):
+        # Every cell each box overlaps, as (cell ids, box indices)
+        x0, y0, x1, y1 = np.floor(boxes / self.cell).astype(np.int64).T
+        extra_x = np.minimum(x1 - x0, self.cols - 1)
+        extra_y = np.minimum(y1 - y0, self.rows - 1)
+        span = (int(extra_x.max(initial=0)), int(extra_y.max(initial=0)))
+        offsets = self.offsets.get(span)
+        if offsets is None:
+            offsets = self.offsets[span] = np.indices((span[0] + 1, span[1] + 1)).reshape(2, -1)
+        offset_x, offset_y = offsets
+        owner, k = np.nonzero((offset_x <= extra_x[:, None]) & (offset_y <= extra_y[:, None]))
+        col = (x0 % self.cols)[owner] + offset_x[k]
+        col[col >= self.cols] -= self.cols
+        row = (y0 % self.rows)[owner] + offset_y[k]
+        row[row >= self.rows] -= self.rows
+        return row * self.cols + col, owner
+
+    def build(self, points):
+        col = np.floor(points[:, 0] / self.cell[0]).astype(np.int64) % self.cols
+        row = np.floor(points[:, 1] / self.cell[1]).astype(np.int64) % self.rows
+        cells = row * self.cols + col
+        self.keys = np.argsort(cells, kind='stable')
+        self.cells = cells[self.keys]
+
+    def pairs(self, boxes):
+        # (box, item) index pairs for the items in cells each box overlaps,
+        # each pair once
+        cells, owner = self._cover(boxes)
+        first = np.searchsorted(self.cells, cells)
+        counts = np.searchsorted(self.cells, cells, 'right') - first
+        ends = np.cumsum(counts)
+        entry = np.arange(ends[-1] if len(ends) else 0) + np.repeat(first - ends + counts, counts)
+        return np.repeat(owner, counts), self.keys[entry]
+
+class Pool:
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, *args):
+        if self.free:
+            self.hits += 1
+            obj = self.free.pop()
+            obj.init(*args)
+            return obj
+        self.misses += 1
+        return self.cls(*args)
+
+    def release_all(self, objs):
+        self.free.extend(objs)
+
+class EntityStore:
+    # Live entities packed densely for iteration, addressed by handles that
+    # go stale once their entity is gone. Despawns are queued during a tick
+    # and applied together by flush(), each filling the freed spot with the
+    # last entity.
+    def __init__(self):
+        self.items = []
+        self.item_slots = []
+        self.positions = []  # where each slot's entity sits in items
+        self.generations = []
+        self.free_slots = []
+        self.doomed = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def spawn(self, item):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.generations)
+            self.generations.append(0)
+            self.positions.append(-1)
+        self.positions[slot] = len(self.items)
+        self.items.append(item)
+        self.item_slots.append(slot)
+        item.handle = self.generations[slot] << 32 | slot
+        return item.handle
+
+    def get(self, handle):
+        slot = handle & 0xffffffff
+        if slot < len(self.generations) and self.generations[slot] == handle >> 32:
+            return self.items[self.positions[slot]]
+        return None
+
+    def despawn(self, handle):
+        if self.get(handle) is not None:
+            self.doomed[handle] = None
+
+    def despawning(self, handle):
+        return handle in self.doomed
+
+    def flush(self):
+        # Returns the removed entities, e.g. to hand back to a Pool
+        items = self.items
+        item_slots = self.item_slots
+        removed = []
+        for handle in self.doomed:
+            slot = handle & 0xffffffff
+            position = self.positions[slot]
+            removed.append(items[position])
+            last = items.pop()
+            last_slot = item_slots.pop()
+            if position < len(items):
+                items[position] = last
+                item_slots[position] = last_slot
+                self.positions[last_slot] = position
+            self._free(slot)
+        self.doomed.clear()
+        return removed
+
+    def clear(self):
+        removed = self.items
+        for slot in self.item_slots:
+            self._free(slot)
+        self.items = []
+        self.item_slots = []
+        self.doomed.clear()
+        return removed
+
+    def _free(self, slot):
+        self.generations[slot] += 1
+        self.positions[slot] = -1
+        self.free_slots.append(slot)
+
+class ColumnSystem:
+    # Entities kept as parallel numpy columns, one row each, the first
+    # count rows live. COLUMNS names the arrays in snapshot order.
+    COLUMNS = ()
+
+    def __len__(self):
+        return self.count
+
+    def columns(self):
+        return tuple(getattr(self, name) for name in self.COLUMNS)
+
+    def _reserve(self, needed):
+        capacity = len(self.lifetime)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def keep(self, alive):
+        # Stable compaction, so survivors keep their spawn order
+        n = self.count
+        if alive.all():
+            return
+        live = int(alive.sum())
+        for arr in self.columns():
+            arr[:live] = arr[:n][alive]
+        self.count = live
+
+class ParticleSystem(ColumnSystem):
+    COLUMNS = ('pos', 'vel', 'lifetime', 'size', 'color')
+
+    def __init__(self, capacity=256, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        # Fraction of each requested burst actually spawned, lowered by the
+        # front-end when frames run over budget
+        self.density = 1.0
+
+    def spawn(self, x, y, color, count=1):
+        # color is one RGB tuple, or a list of them to pick from per particle
+        if self.density < 1:
+            count = max(1, round(count * self.density))
+        start = self.count
+        end = start + count
+        self._reserve(end)
+        rng = self.rng
+
+        speed = rng.uniform(0.5, 2.0, count)
+        angle = rng.uniform(0, 2 * math.pi, count)
+        self.pos[start:end] = (x, y)
+        self.vel[start:end, 0] = speed * np.cos(angle)
+        self.vel[start:end, 1] = speed * np.sin(angle)
+        self.size[start:end] = rng.integers(1, 4, count)
+        self.lifetime[start:end] = rng.integers(20, 41, count)
+
+        palette = np.asarray(color, dtype=np.uint8)
+        if palette.ndim == 2:
+            palette = palette[rng.integers(0, len(palette), count)]
+        self.color[start:end] = palette
+        self.count = end
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        self.pos[:n] += self.vel[:n]
+        self.lifetime[:n] -= 1
+        self.keep(self.lifetime[:n] > 0)
+
+class Powerup:
+    def __init__(self, x, y, rng=random):
+        self.x = x
+        self.y = y
+        self.radius = 15
+        self.type = rng.choice(POWERUP_TYPES)
+        self.color = POWERUP_COLORS[self.type]
+        self.lifetime = 600  # 10 seconds at 60 FPS
+
+    def update(self):
+        self.lifetime -= 1
+
+class Asteroid:
+    __slots__ = ('size', 'x', 'y', 'prev_x', 'prev_y', 'radius', 'hp', 'color',
+                 'score_value', 'dx', 'dy', 'rotation', 'rotation_speed', 'shape_id',
+                 'points', 'handle')
+
+    def __init__(self, size, x, y, rng=random):
+        self.points = []
+        self.init(size, x, y, rng)
+
+    def init(self, size, x, y, rng=random):
+        self.size = size
+        self.x = x
+        self.y = y
+        # Position one tick ago, for renderers drawing between ticks
+        self.prev_x = x
+        self.prev_y = y
+
+        if size == SMALL:
+            self.radius = 20
+            self.hp = 1
+            self.color = (0, 0, rng.randint(200, 255))  # Shades of blue
+            self.score_value = 100
+            speed = rng.uniform(3, 5)
+        elif size == MEDIUM:
+            self.radius = 40
+            self.hp = 2
+            self.color = (0, rng.randint(200, 255), 0)  # Shades of green
+            self.score_value = 50
+            speed = rng.uniform(2, 4)
+        elif size == LARGE:
+            self.radius = 60
+            self.hp = 3
+            self.color = (rng.randint(200, 255), 0, 0)  # Shades of red
+            self.score_value = 20
+            speed = rng.uniform(1, 3)
+
+        angle = rng.uniform(0, 2 * math.pi)
+        self.dx = speed * math.cos(angle)
+        self.dy = speed * math.sin(angle)
+        self.rotation = 0
+        self.rotation_speed = rng.uniform(-2, 2)
+
+        num_sides = rng.randint(6, 10)
+        self.shape_id = next(_shape_ids)
+        self.points.clear()
+        for i in range(num_sides):
+            angle = 2 * math.pi * i / num_sides
+            r = self.radius + rng.uniform(-self.radius * 0.3, self.radius * 0.3)
+            px = r * math.cos(angle)
+            py = r * math.sin(angle)
+            self.points.append((px, py))
+
+    def advance(self, ticks, width=screen_width, height=screen_height):
+        # Several ticks of movement in one go, for asteroids nobody can see.
+        # Only big worlds have those, and they wrap seamlessly.
+        self.x = (self.x + self.dx * ticks) % width
+        self.y = (self.y + self.dy * ticks) % height
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.rotation += self.rotation_speed * ticks
+
+    def update(self, width=screen_width, height=screen_height, seamless=False):
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.x += self.dx
+        self.y += self.dy
+        self.rotation += self.rotation_speed
+
+        if seamless:
+            self.x %= width
+            self.y %= height
+            return
+        if self.x < -self.radius:
+            self.x = width + self.radius
+        elif self.x > width + self.radius:
+            self.x = -self.radius
+        if self.y < -self.radius:
+            self.y = height + self.radius
+        elif self.y > height + self.radius:
+            self.y = -self.radius
+
+class Spaceship:
+    def __init__(self, x, y, rng=random, particle_rng=None):
+        self.rng = rng
+        self.x = x
+        self.y = y
+        self.angle = 0
+        self.prev_x = x
+        self.prev_y = y
+        self.prev_angle = 0
+        self.dx = 0
+        self.dy = 0
+        self.max_speed = 5
+        self.points = SHIP_HULL
+        self.lives = 3
+        self.shield = 0
+        self.shield_strength = 100
+        self.respawn_timer = 0
+        self.invulnerable_timer = 0
+        self.fire_cooldown = 0
+        self.rapid_fire = 0
+        self.triple_shot = 0
+        self.thrust_particles = ParticleSystem(32, particle_rng)
+        self.thrusting = False
+
+    def update(self, inputs=NO_INPUT, width=screen_width, height=screen_height, seamless=False):
+        if self.respawn_timer > 0:
+            self.respawn_timer -= 1
+            return
+
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.prev_angle = self.angle
+        if inputs.left:
+            self.angle -= 5
+        if inputs.right:
+            self.angle += 5
+        if inputs.up:
+            cos = COS[self.angle + TRIG_OFFSET]
+            sin = SIN[self.angle + TRIG_OFFSET]
+            self.dx += 0.2 * cos
+            self.dy += 0.2 * sin
+
+            if self.rng.random() < 0.3:
+                offset_x = -10 * cos
+                offset_y = -10 * sin
+                color = self.rng.choice([YELLOW, RED])
+                self.thrust_particles.spawn(self.x + offset_x, self.y + offset_y, color)
+
+        self.dx *= 0.98
+        self.dy *= 0.98
+
+        speed = math.hypot(self.dx, self.dy)
+        if speed > self.max_speed:
+            self.dx = self.dx / speed * self.max_speed
+            self.dy = self.dy / speed * self.max_speed
+
+        self.x += self.dx
+        self.y += self.dy
+
+        if seamless:
+            self.x %= width
+            self.y %= height
+        else:
+            if self.x < 0:
+                self.x = width
+            elif self.x > width:
+                self.x = 0
+            if self.y < 0:
+                self.y = height
+            elif self.y > height:
+                self.y = 0
+
+        self.angle %= 360
+        if self.fire_cooldown > 0:
+            self.fire_cooldown -= 1
+        if self.invulnerable_timer > 0:
+            self.invulnerable_timer -= 1
+        if self.shield > 0:
+            self.shield -= 1
+        if self.rapid_fire > 0:
+            self.rapid_fire -= 1
+        if self.triple_shot > 0:
+            self.triple_shot -= 1
+
+        self.thrust_particles.update()
+
+    def fire(self, bullets):
+        if self.respawn_timer > 0:
+            return False
+
+        if self.fire_cooldown <= 0:
+            tip_x = self.x + 20 * COS[self.angle + TRIG_OFFSET]
+            tip_y = self.y + 20 * SIN[self.angle + TRIG_OFFSET]
+
+            if self.triple_shot > 0:
+                bullets.spawn(tip_x, tip_y, self.angle)
+                bullets.spawn(tip_x, tip_y, self.angle - 15)
+                bullets.spawn(tip_x, tip_y, self.angle + 15)
+            else:
+                bullets.spawn(tip_x, tip_y, self.angle)
+
+            if self.rapid_fire > 0:
+                self.fire_cooldown = 5
+            else:
+                self.fire_cooldown = 15
+            return True
+        return False
+
+    def hit(self):
+        if self.respawn_timer > 0 or self.invulnerable_timer > 0:
+            return False
+
+        if self.shield > 0:
+            self.shield_strength -= 0
+            if self.shield_strength <= 0:
+                self.shield = 0
+            return False
+
+        self.lives -= 1
+        if self.lives > 0:
+            self.respawn_timer = 120  # 2 seconds
+            self.invulnerable_timer = 180  # 3 seconds of invulnerability after respawn
+        return True
+
+    def respawn(self, x, y):
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
+        self.dx = 0
+        self.dy = 0
+        self.angle = self.prev_angle = 0
+
+    def activate_powerup(self, powerup_type):
+        if powerup_type == 'shield':
+            self.shield = 600  # 10 seconds
+            self.shield_strength = 100
+        elif powerup_type == 'triple_shot':
+            self.triple_shot = 300  # 5 seconds
+        elif powerup_type == 'rapid_fire':
+            self.rapid_fire = 300  # 5 seconds
+
+# Past positions each bullet keeps for drawing its trail
+TRAIL_LENGTH = 5
+
+class BulletSystem(ColumnSystem):
+    COLUMNS = ('pos', 'vel', 'lifetime', 'trail', 'trail_head', 'trail_len')
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+        # Each bullet's last positions in a fixed ring: trail_head is the
+        # next slot to write, trail_len how many slots are filled.
+        self.trail = np.zeros((capacity, TRAIL_LENGTH, 2))
+        self.trail_head = np.zeros(capacity, dtype=np.int32)
+        self.trail_len = np.zeros(capacity, dtype=np.int32)
+
+    def spawn(self, x, y, angle):
+        i = self.count
+        self._reserve(i + 1)
+        speed = 10
+        self.pos[i] = (x, y)
+        self.vel[i] = (speed * COS[angle + TRIG_OFFSET], speed * SIN[angle + TRIG_OFFSET])
+        self.lifetime[i] = 60  # Disappears after 60 frames
+        self.trail_head[i] = 0
+        self.trail_len[i] = 0
+        self.count = i + 1
+
+    def update(self, width=screen_width, height=screen_height, seamless=False):
+        n = self.count
+        if n == 0:
+            return
+        head = self.trail_head[:n]
+        self.trail[np.arange(n), head] = self.pos[:n]
+        head += 1
+        head %= TRAIL_LENGTH
+        np.minimum(self.trail_len[:n] + 1, TRAIL_LENGTH, out=self.trail_len[:n])
+
+        pos = self.pos[:n]
+        pos += self.vel[:n]
+        self.lifetime[:n] -= 1
+
+        if seamless:
+            pos %= (width, height)
+        else:
+            for axis, limit in ((0, width), (1, height)):
+                coord = pos[:, axis]
+                low = coord < 0
+                high = coord > limit
+                coord[low] = limit
+                coord[high] = 0
+
+        self.keep(self.lifetime[:n] > 0)
+
+    def segments(self, width=screen_width, height=screen_height, seamless=False):
+        # Each bullet's move over the last tick as start points and steps,
+        # with the bullet each segment belongs to
+        n = self.count
+        pos = self.pos[:n]
+        vel = self.vel[:n]
+        # Bullets spawned outside update haven't moved yet and are tested
+        # where they are
+        start = pos - vel
+        unmoved = self.trail_len[:n] == 0
+        start[unmoved] = pos[unmoved]
+        step = pos - start
+        owners = np.arange(n)
+        if not seamless:
+            # A bullet that wrapped restarted at the opposite edge, which
+            # puts its start outside the field; the stretch up to the edge
+            # it left is a segment too. On a seamless world pos - vel is the
+            # true start.
+            wrapped = ((start < 0) | (start > (width, height))).any(axis=1)
+            if wrapped.any():
+                rows = np.flatnonzero(wrapped)
+                last = self.trail[rows, (self.trail_head[rows] - 1) % TRAIL_LENGTH]
+                start = np.concatenate([start, last])
+                step = np.concatenate([step, vel[rows]])
+                owners = np.concatenate([owners, rows])
+        return start, step, owners
+
+    def hits(self, segments, circles, segment=None, target=None, world=None):
+        # Which circles each bullet touched during the last tick, as
+        # (bullet, circle indices in the order it reached them) for every
+        # bullet that touched any. Circles are rows of x, y, dx, dy, radius.
+        # Only the given (segment, circle) pairs are swept, or every pair
+        # without them; on a seamless world pairs are measured the short
+        # way round.
+        start, step, owners = segments
+        if segment is None:
+            times = self._sweep(start.T[:, :, None], step.T[:, :, None],
+                                circles.T[:, None, :], world)
+            segment, target = np.nonzero(times < math.inf)
+            times = times[segment, target]
+        else:
+            times = self._sweep(np.take(start.T, segment, axis=1),
+                                np.take(step.T, segment, axis=1),
+                                np.take(circles.T, target, axis=1), world)
+            hit = times < math.inf
+            segment, target, times = segment[hit], target[hit], times[hit]
+        bullet = owners[segment]
+        order = np.lexsort((target, times, bullet))
+        return [(index, [circle for _, circle in group]) for index, group in itertools.groupby(
+            zip(bullet[order].tolist(), target[order].tolist()), key=lambda pair: pair[0])]
+
+    @staticmethod
+    def _sweep(start, step, circles, world=None):
+        # Segment against circle, in the circle's frame of reference: when
+        # in the tick they first touched, inf if never. Takes columns (x, y
+        # and x, y, dx, dy, radius) that broadcast against each other.
+        x, y, cdx, cdy, radius = circles
+        fx = start[0] - (x - cdx)
+        fy = start[1] - (y - cdy)
+        if world is not None:
+            fx -= world[0] * np.round(fx / world[0])
+            fy -= world[1] * np.round(fy / world[1])
+        dx = step[0] - cdx
+        dy = step[1] - cdy
+        a = dx * dx
+        a += dy * dy
+        b = fx * dx
+        b += fy * dy
+        c = fx * fx
+        c += fy * fy
+        c -= radius * radius
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = b * b
+            t -= a * c
+            np.sqrt(t, out=t)
+            t += b
+            t /= a
+            np.negative(t, out=t)
+        times = np.where((t >= 0) & (t <= 1), t, math.inf)
+        times[c < 0] = 0.0  # started the tick inside
+        return times
+
+    def clear(self):
+        self.count = 0
+
+# Snapshot layout (little-endian, version 3):
+#   header, game fields, message text, RNG states, one record per ship,
+#   section counts, asteroid records (awake, then dormant), asteroid
+#   outline points, bullet columns, powerup records, particle columns,
+#   thrust particle columns for each ship.
+SNAPSHOT_MAGIC = b'AGSS'
+SNAPSHOT_VERSION = 3
+_SNAP_HEADER = struct.Struct('<4sHQ')  # magic, version, process token
+_SNAP_GAME = struct.Struct('<Q2i2iBBI2iH')  # seed, size, score, level, players, state, tick, timers, message length
+_SNAP_RANDOM = struct.Struct('<625I?d')  # Mersenne Twister state and gauss_next
+_SNAP_PCG = struct.Struct('<16s16s?I')  # PCG64 state, increment, has_uint32, uinteger
+_SNAP_SHIP = struct.Struct('<4d10iI')  # ... thrust particle count
+_SNAP_COUNTS = struct.Struct('<5I')
+_ASTEROID_RECORD = np.dtype([
+    ('shape_id', '<i8'), ('size', '<i4'), ('hp', '<i4'), ('radius', '<i4'),
+    ('score_value', '<i4'), ('color', 'u1', 3), ('num_points', 'u1'),
+    ('x', '<f8'), ('y', '<f8'), ('dx', '<f8'), ('dy', '<f8'),
+    ('rotation', '<f8'), ('rotation_speed', '<f8'), ('dormant', '?'),
+])
+_POWERUP_RECORD = np.dtype([('type', 'u1'), ('lifetime', '<i4'), ('x', '<f8'), ('y', '<f8')])
+
+# Shape ids only mean something inside the process that made them
+_PROCESS_TOKEN = random.SystemRandom().getrandbits(64)
+
+def _pack_columns(parts, columns, n):
+    for column in columns:
+        parts.append(column[:n].tobytes())
+
+def _unpack_columns(view, offset, columns, n):
+    # Reads straight out of the buffer, one copy into the live arrays
+    for column in columns:
+        count = n * int(np.prod(column.shape[1:], dtype=np.int64))
+        data = np.frombuffer(view, column.dtype, count, offset)
+        column[:n] = data.reshape((n,) + column.shape[1:])
+        offset += count * column.itemsize
+    return offset
+
+class Game:
+    def __init__(self, seed=None, width=screen_width, height=screen_height, players=1):
+        if seed is None:
+            seed = random.randrange(MAX_SEED + 1)
+        elif not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"seed must be between 0 and {MAX_SEED}, got {seed}")
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.players = players
+        self.profiler = NULL_PROFILER
+        # A world bigger than the screen is drawn scrolling over its seam,
+        # so everything in it wraps modulo its size and collides the short
+        # way round. The screen-sized world keeps its original edges.
+        self.seamless = (width, height) != (screen_width, screen_height)
+        # Asteroids can only get out of range of the ships in a big world
+        self.dormancy = math.hypot(width / 2, height / 2) > WAKE_RANGE
+        self.grid = SpatialHash(CELL_SIZE, width, height)
+        # Gameplay randomness and cosmetic particles draw from separate
+        # streams, so particle tweaks never change how a run plays out.
+        self.rng = random.Random(self.seed)
+        self.particle_rng = np.random.default_rng(self.seed)
+        # Recycled asteroids, so splits don't churn the garbage collector
+        self.asteroid_pool = Pool(Asteroid)
+        self.asteroids = EntityStore()
+        self.dormant_asteroids = EntityStore()
+        self.bullets = BulletSystem()
+        self.reset()
+
+    def reset(self):
+        self.ships = [Spaceship(*self.spawn_point(player), self.rng, self.particle_rng)
+                      for player in range(self.players)]
+        self.spaceship = self.ships[0]
+        self.asteroid_pool.release_all(self.asteroids.clear())
+        self.asteroid_pool.release_all(self.dormant_asteroids.clear())
+        self.bullets.clear()
+        self.particles = ParticleSystem(1024, self.particle_rng)
+        self.powerups = EntityStore()
+        self.score = 0
+        self.level = 1
+        self.state = "start"
+        self.tick = 0
+        self.level_timer = 0
+        self.message = ""
+        self.message_timer = 0
+        self.events = []
+
+    def start_level(self):
+        self.asteroid_pool.release_all(self.asteroids.clear())
+        self.asteroid_pool.release_all(self.dormant_asteroids.clear())
+        # Bigger worlds get proportionally more asteroids
+        scale = max(1, self.width * self.height // (screen_width * screen_height))
+        for _ in range((2 + self.level) * scale):
+            x, y = self.asteroid_position()
+            self.asteroids.spawn(self.asteroid_pool.acquire(LARGE, x, y, self.rng))
+        for _ in range(self.level * scale):
+            x, y = self.asteroid_position()
+            self.asteroids.spawn(self.asteroid_pool.acquire(MEDIUM, x, y, self.rng))
+        self.state = "playing"
+
+    def spawn_point(self, player):
+        # Ships line up side by side around the middle of the screen
+        return (self.width // 2 + (2 * player - (self.players - 1)) * 40,
+                self.height // 2)
+
+    def living_ships(self):
+        return [ship for ship in self.ships if ship.lives > 0]
+
+    def asteroid_position(self):
+        if not self.dormancy:
+            return self.corner_position()
+        # Anywhere outside the screen the ships start in
+        rng = self.rng
+        while True:
+            x = rng.uniform(0, self.width)
+            y = rng.uniform(0, self.height)
+            if (abs(x - self.width / 2) > screen_width / 2 + 60
+                    or abs(y - self.height / 2) > screen_height / 2 + 60):
+                return x, y
+
+    def near_ships(self, x, y, distance, ships):
+        # Distance on the wrapping world
+        for ship in ships:
+            dx = abs(x - ship.x) % self.width
+            dy = abs(y - ship.y) % self.height
+            if math.hypot(min(dx, self.width - dx), min(dy, self.height - dy)) < distance:
+                return True
+        return False
+
+    def update_asteroids(self, ships):
+        width = self.width
+        height = self.height
+        if not self.dormancy:
+            for asteroid in self.asteroids:
+                asteroid.update(width, height, self.seamless)
+            return
+
+        awake = self.asteroids
+        dormant = self.dormant_asteroids
+        for asteroid in awake:
+            asteroid.update(width, height, True)
+            if not self.near_ships(asteroid.x, asteroid.y, SLEEP_RANGE, ships):
+                awake.despawn(asteroid.handle)
+        for asteroid in dormant.items[self.tick % DORMANT_INTERVAL::DORMANT_INTERVAL]:
+            asteroid.advance(DORMANT_INTERVAL, width, height)
+            if self.near_ships(asteroid.x, asteroid.y, WAKE_RANGE, ships):
+                dormant.despawn(asteroid.handle)
+        # Nothing else is queued yet this tick, so only the moves come out
+        falling_asleep = awake.flush()
+        for asteroid in dormant.flush():
+            awake.spawn(asteroid)
+        for asteroid in falling_asleep:
+            dormant.spawn(asteroid)
+
+    def corner_position(self):
+        # Somewhere within 100px of a corner, away from the ship
+        rng = self.rng
+        x = rng.choice([rng.randint(0, 100), rng.randint(self.width - 100, self.width)])
+        y = rng.choice([rng.randint(0, 100), rng.randint(self.height - 100, self.height)])
+        return x, y
+
+    def show_message(self, text, duration=120):
+        self.message = text
+        self.message_timer = duration
+
+    def update(self, inputs=NO_INPUT):
+        # One Input, or a sequence with one Input per player
+        if isinstance(inputs, Input):
+            inputs = (inputs,)
+        # Sound cues for the front-end, collected fresh every tick
+        self.events = []
+        self.tick += 1
+        for ship, ship_inputs in zip(self.ships, inputs):
+            ship.thrusting = ship_inputs.up
+
+        if any(ship_inputs.start for ship_inputs in inputs):
+            if self.state == "start":
+                self.start_level()
+            elif self.state == "game_over":
+                self.reset()
+        for ship, ship_inputs in zip(self.ships, inputs):
+            if ship_inputs.fire and self.state == "playing" and ship.lives > 0:
+                if ship.fire(self.bullets):
+                    self.events.append("shoot")
+            if ship_inputs.cheat:
+                ship.lives = 999
+
+        if self.message_timer > 0:
+            self.message_timer -= 1
+
+        if self.state == "start":
+            pass
+        elif self.state == "level_complete":
+            self.level_timer -= 1
+            if self.level_timer <= 0:
+                self.level += 1
+                self.start_level()
+                self.show_message(f"Level {self.level}")
+                for ship in self.living_ships():
+                    if ship.lives <= 996:
+                        ship.lives += 3
+                self.events.append("level_up")
+        elif self.state == "game_over":
+            pass
+        elif self.state == "playing":
+            profiler = self.profiler
+            with profiler.section('update_ship'):
+                flying = False
+                for player, (ship, ship_inputs) in enumerate(zip(self.ships, inputs)):
+                    if ship.lives <= 0:
+                        continue
+                    if ship.respawn_timer <= 0:
+                        ship.update(ship_inputs, self.width, self.height, self.seamless)
+                        flying = True
+                    else:
+                        ship.respawn_timer -= 1
+                        if ship.respawn_timer == 0:
+                            ship.respawn(*self.spawn_point(player))
+
+                if flying and len(self.asteroids) + len(self.dormant_asteroids) == 0:
+                    self.state = "level_complete"
+                    self.level_timer = 120  # 2 seconds
+                    self.show_message("Level Complete!")
+
+            # Lives only change in check_collisions, so this holds until then
+            ships = self.living_ships()
+            with profiler.section('update_asteroids'):
+                self.update_asteroids(ships)
+
+            with profiler.section('update_bullets'):
+                self.bullets.update(self.width, self.height, self.seamless)
+
+            with profiler.section('update_particles'):
+                self.particles.update()
+
+            with profiler.section('update_powerups'):
+                for powerup in self.powerups:
+                    powerup.update()
+                    if powerup.lifetime <= 0:
+                        self.powerups.despawn(powerup.handle)
+
+            with profiler.section('check_collisions'):
+                self.check_collisions(ships)
+
+            if len(self.powerups) < 1 and self.rng.random() < 0.001:
+                self.powerups.spawn(
+                    Powerup(self.rng.randint(50, self.width-50),
+                           self.rng.randint(50, self.height-50), self.rng)
+                )
+
+        # Everything despawned this tick leaves at once; destroyed asteroids
+        # only go back to the pool here, so a split never reuses its parent
+        self.asteroid_pool.release_all(self.asteroids.flush())
+        self.powerups.flush()
+
+    def check_collisions(self, ships):
+        asteroids_to_add = []
+
+        # Despawns wait for the flush and children spawn after the bullets,
+        # so the store's list keeps its order throughout
+        asteroids = self.asteroids
+        targets = asteroids.items
+        gridded = len(targets)
+        bullets = self.bullets
+        alive = np.ones(bullets.count, dtype=bool)
+        vulnerable = [ship for ship in ships if ship.respawn_timer <= 0]
+        struck = []
+        # Without the grid each ship checks every asteroid
+        near_ships = [targets[:gridded]] * len(vulnerable)
+        if bullets.count and targets:
+            circles = []
+            for asteroid in targets:
+                circles += (asteroid.x, asteroid.y, asteroid.dx, asteroid.dy, asteroid.radius)
+            circles = np.array(circles).reshape(-1, 5)
+            segments = bullets.segments(self.width, self.height, self.seamless)
+            start, step, _ = segments
+            segment = target = None
+            if bullets.count * gridded >= GRID_MIN_PAIRS:
+                # Broadphase: the grid finds the asteroids near each
+                # bullet's move this tick and near each ship. Every point an
+                # asteroid covered during its own move lies within reach of
+                # where it is now.
+                self.grid.build(circles[:, :2])
+                reach = float((circles[:, 4] + np.abs(circles[:, 2:4]).max(axis=1)).max())
+                end = start + step
+                probe, target = self.grid.pairs(np.vstack([
+                    np.hstack([np.minimum(start, end) - reach, np.maximum(start, end) + reach]),
+                    np.array([(ship.x - 15 - reach, ship.y - 15 - reach,
+                               ship.x + 15 + reach, ship.y + 15 + reach)
+                              for ship in vulnerable]).reshape(-1, 4),
+                ]))
+                near_ship = probe >= len(start)
+                near_ships = [[] for _ in vulnerable]
+                for number, order in sorted(zip((probe[near_ship] - len(start)).tolist(),
+                                                target[near_ship].tolist())):
+                    near_ships[number].append(targets[order])
+                segment = probe[~near_ship]
+                target = target[~near_ship]
+
+            # Bullets are swept along their whole move this tick, so a fast
+            # one can't skip past a small asteroid; each hits the first
+            # asteroid it reached.
+            struck = bullets.hits(segments, circles, segment, target,
+                                  (self.width, self.height) if self.seamless else None)
+        for index, orders in struck:
+            for order in orders:
+                asteroid = targets[order]
+                if asteroids.despawning(asteroid.handle):
+                    continue
+
+                self.particles.spawn(asteroid.x, asteroid.y, asteroid.color, 10)
+
+                asteroid.hp -= 1
+                self.score += 10
+                alive[index] = False
+
+                if asteroid.hp <= 0:
+                    self.score += asteroid.score_value
+                    self.events.append("explosion")
+
+                    if asteroid.size == LARGE:
+                        for _ in range(2):
+                            asteroids_to_add.append(
+                                self.asteroid_pool.acquire(MEDIUM, asteroid.x, asteroid.y, self.rng)
+                            )
+                    elif asteroid.size == MEDIUM:
+                        for _ in range(2):
+                            asteroids_to_add.append(
+                                self.asteroid_pool.acquire(SMALL, asteroid.x, asteroid.y, self.rng)
+                            )
+
+                    self.particles.spawn(asteroid.x, asteroid.y, asteroid.color, 20)
+                    
+                    if self.rng.random() < 0.2:
+                        self.powerups.spawn(
+                            Powerup(asteroid.x, asteroid.y, self.rng)
+                        )
+
+                    asteroids.despawn(asteroid.handle)
+                break
+        bullets.keep(alive)
+
+        for asteroid in asteroids_to_add:
+            asteroids.spawn(asteroid)
+
+        width = self.width
+        height = self.height
+        seamless = self.seamless
+        for ship, nearby in zip(vulnerable, near_ships):
+            # Asteroids spawned by this tick's hits weren't in the broadphase
+            for asteroid in nearby + targets[gridded:]:
+                if asteroids.despawning(asteroid.handle):
+                    continue
+                dx = ship.x - asteroid.x
+                dy = ship.y - asteroid.y
+                if seamless:
+                    dx -= width * round(dx / width)
+                    dy -= height * round(dy / height)
+                if math.hypot(dx, dy) < asteroid.radius + 15:
+                    if ship.hit():
+
+                        self.particles.spawn(ship.x, ship.y, [WHITE, YELLOW, RED], 30)
+                        self.events.append("ship_explosion")
+
+                        if all(other.lives <= 0 for other in ships):
+                            self.state = "game_over"
+                            self.show_message("Game Over", 300)
+                    break
+
+        powerups = self.powerups
+        for powerup in powerups:
+            if powerups.despawning(powerup.handle):
+                continue
+            for ship in ships:
+                dx = ship.x - powerup.x
+                dy = ship.y - powerup.y
+                if seamless:
+                    dx -= width * round(dx / width)
+                    dy -= height * round(dy / height)
+                if math.hypot(dx, dy) < powerup.radius + 15:
+                    ship.activate_powerup(powerup.type)
+                    powerups.despawn(powerup.handle)
+                    self.show_message(f"{powerup.type.replace('_', ' ').title()} activated!")
+                    break
+
+    def snapshot(self):
+        message = self.message.encode()
+        version, mt_state, gauss = self.rng.getstate()
+        pcg = self.particle_rng.bit_generator.state
+
+        parts = [
+            _SNAP_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _PROCESS_TOKEN),
+            _SNAP_GAME.pack(self.seed, self.width, self.height, self.score, self.level,
+                            self.players, GAME_STATES.index(self.state), self.tick,
+                            self.level_timer, self.message_timer, len(message)),
+            message,
+            _SNAP_RANDOM.pack(*mt_state, gauss is not None, gauss or 0.0),
+            _SNAP_PCG.pack(pcg['state']['state'].to_bytes(16, 'little'),
+                           pcg['state']['inc'].to_bytes(16, 'little'),
+                           bool(pcg['has_uint32']), pcg['uinteger']),
+        ]
+        for ship in self.ships:
+            parts.append(_SNAP_SHIP.pack(
+                ship.x, ship.y, ship.dx, ship.dy, ship.angle, ship.lives, ship.shield,
+                ship.shield_strength, ship.respawn_timer, ship.invulnerable_timer,
+                ship.fire_cooldown, ship.rapid_fire, ship.triple_shot, ship.thrusting,
+                ship.thrust_particles.count))
+
+        everything = list(self.asteroids) + list(self.dormant_asteroids)
+        asteroids = np.array([
+            (a.shape_id, a.size, a.hp, a.radius, a.score_value, a.color, len(a.points),
+             a.x, a.y, a.dx, a.dy, a.rotation, a.rotation_speed, i >= len(self.asteroids))
+            for i, a in enumerate(everything)], dtype=_ASTEROID_RECORD)
+        points = np.array([p for a in everything for p in a.points],
+                          dtype='<f8').reshape(-1, 2)
+        powerups = np.array([
+            (POWERUP_TYPES.index(p.type), p.lifetime, p.x, p.y)
+            for p in self.powerups], dtype=_POWERUP_RECORD)
+
+        parts.append(_SNAP_COUNTS.pack(len(asteroids), len(points), self.bullets.count,
+                                       len(powerups), self.particles.count))
+        parts.append(asteroids.tobytes())
+        parts.append(points.tobytes())
+        _pack_columns(parts, self.bullets.columns(), self.bullets.count)
+        parts.append(powerups.tobytes())
+        _pack_columns(parts, self.particles.columns(), self.particles.count)
+        for ship in self.ships:
+            _pack_columns(parts, ship.thrust_particles.columns(), ship.thrust_particles.count)
+        return b''.join(parts)
+
+    def restore(self, data):
+        view = memoryview(data)
+        magic, version, token = _SNAP_HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not an AsteroidGame snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+        offset = _SNAP_HEADER.size
+
+        (self.seed, self.width, self.height, self.score, self.level, players, state,
+         self.tick, self.level_timer, self.message_timer,
+         message_len) = _SNAP_GAME.unpack_from(view, offset)
+        self.state = GAME_STATES[state]
+        self.seamless = (self.width, self.height) != (screen_width, screen_height)
+        self.dormancy = math.hypot(self.width / 2, self.height / 2) > WAKE_RANGE
+        self.grid = SpatialHash(CELL_SIZE, self.width, self.height)
+        offset += _SNAP_GAME.size
+        self.message = bytes(view[offset:offset + message_len]).decode()
+        offset += message_len
+
+        values = _SNAP_RANDOM.unpack_from(view, offset)
+        self.rng.setstate((3, values[:625], values[626] if values[625] else None))
+        offset += _SNAP_RANDOM.size
+        pcg_state, pcg_inc, has_uint32, uinteger = _SNAP_PCG.unpack_from(view, offset)
+        self.particle_rng.bit_generator.state = {
+            'bit_generator': 'PCG64',
+            'state': {'state': int.from_bytes(pcg_state, 'little'),
+                      'inc': int.from_bytes(pcg_inc, 'little')},
+            'has_uint32': int(has_uint32),
+            'uinteger': uinteger,
+        }
+        offset += _SNAP_PCG.size
+
+        if players != self.players:
+            self.players = players
+            self.ships = [Spaceship(0, 0, self.rng, self.particle_rng)
+                          for _ in range(players)]
+            self.spaceship = self.ships[0]
+        thrust_counts = []
+        for ship in self.ships:
+            (ship.x, ship.y, ship.dx, ship.dy, ship.angle, ship.lives, ship.shield,
+             ship.shield_strength, ship.respawn_timer, ship.invulnerable_timer,
+             ship.fire_cooldown, ship.rapid_fire, ship.triple_shot, thrusting,
+             num_thrust) = _SNAP_SHIP.unpack_from(view, offset)
+            ship.thrusting = bool(thrusting)
+            ship.prev_x, ship.prev_y, ship.prev_angle = ship.x, ship.y, ship.angle
+            thrust_counts.append(num_thrust)
+            offset += _SNAP_SHIP.size
+
+        (num_asteroids, num_points, num_bullets, num_powerups,
+         num_particles) = _SNAP_COUNTS.unpack_from(view, offset)
+        offset += _SNAP_COUNTS.size
+
+        records = np.frombuffer(view, _ASTEROID_RECORD, num_asteroids, offset)
+        offset += records.nbytes
+        points = np.frombuffer(view, '<f8', num_points * 2, offset).reshape(-1, 2).tolist()
+        offset += num_points * 16
+        self._restore_asteroids(records.tolist(), points, token == _PROCESS_TOKEN)
+
+        self.bullets._reserve(num_bullets)
+        offset = _unpack_columns(view, offset, self.bullets.columns(), num_bullets)
+        self.bullets.count = num_bullets
+
+        self.powerups.clear()
+        for type_index, lifetime, x, y in np.frombuffer(
+                view, _POWERUP_RECORD, num_powerups, offset).tolist():
+            powerup = Powerup.__new__(Powerup)
+            powerup.x = x
+            powerup.y = y
+            powerup.radius = 15
+            powerup.type = POWERUP_TYPES[type_index]
+            powerup.color = POWERUP_COLORS[powerup.type]
+            powerup.lifetime = lifetime
+            self.powerups.spawn(powerup)
+        offset += num_powerups * _POWERUP_RECORD.itemsize
+
+        systems = [self.particles] + [ship.thrust_particles for ship in self.ships]
+        for system, count in zip(systems, [num_particles] + thrust_counts):
+            system._reserve(count)
+            offset = _unpack_columns(view, offset, system.columns(), count)
+            system.count = count
+
+        self.events = []
+
+    def _restore_asteroids(self, records, points, same_process):
+        pool = self.asteroid_pool
+        pool.release_all(self.asteroids.clear())
+        pool.release_all(self.dormant_asteroids.clear())
+        start = 0
+        for (shape_id, size, hp, radius, score_value, color, num_points,
+             x, y, dx, dy, rotation, rotation_speed, dormant) in records:
+            if pool.free:
+                asteroid = pool.free.pop()
+            else:
+                asteroid = Asteroid.__new__(Asteroid)
+                asteroid.points = []
+            asteroid.shape_id = shape_id if same_process else next(_shape_ids)
+            asteroid.size = size
+            asteroid.hp = hp
+            asteroid.radius = radius
+            asteroid.score_value = score_value
+            asteroid.color = tuple(color)
+            asteroid.x = asteroid.prev_x = x
+            asteroid.y = asteroid.prev_y = y
+            asteroid.dx = dx
+            asteroid.dy = dy
+            asteroid.rotation = rotation
+            asteroid.rotation_speed = rotation_speed
+            asteroid.points[:] = [tuple(p) for p in points[start:start + num_points]]
+            start += num_points
+            if dormant:
+                self.dormant_asteroids.spawn(asteroid)
+            else:
+                self.asteroids.spawn(asteroid)
+
+    def pool_stats(self):
+        return {
+            'asteroid_hits': self.asteroid_pool.hits,
+            'asteroid_misses': self.asteroid_pool.misses,
+        }
+
+    def state_hash(self):
+        # Covers everything that affects gameplay; particles are cosmetic
+        h = hashlib.blake2b(digest_size=8)
+        h.update(struct.pack('<3i', self.score, self.level, self.level_timer))
+        h.update(self.state.encode())
+        for ship in self.ships:
+            h.update(struct.pack('<4d', ship.x, ship.y, ship.dx, ship.dy))
+            h.update(struct.pack('<9i', ship.angle, ship.lives, ship.shield,
+                                 ship.shield_strength, ship.respawn_timer,
+                                 ship.invulnerable_timer, ship.fire_cooldown,
+                                 ship.rapid_fire, ship.triple_shot))
+        for asteroid in itertools.chain(self.asteroids, self.dormant_asteroids):
+            h.update(struct.pack('<2i5d', asteroid.size, asteroid.hp, asteroid.x,
+                                 asteroid.y, asteroid.dx, asteroid.dy,
+                                 asteroid.rotation))
+        n = self.bullets.count
+        for lifetime, (x, y) in zip(self.bullets.lifetime[:n].tolist(),
+                                    self.bullets.pos[:n].tolist()):
+            h.update(struct.pack('<i2d', lifetime, x, y))
+        for powerup in self.powerups:
+            h.update(struct.pack('<i2d', powerup.lifetime, powerup.x, powerup.y))
+            h.update(powerup.type.encode())
+        return int.from_bytes(h.digest(), 'little')
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from simulation import SMALL, MEDIUM, LARGE
+from vecenv import VecEnv
+
+@pytest.mark.parametrize('size', [MEDIUM, LARGE])
+def test_split_children_take_parent_size_and_position(size):
+    # The parent sits in slot 0, the first free slot once it is destroyed,
+    # so its first child lands where the second child reads from
+    env = VecEnv(1, seed=0)
+    env.reset()
+    env.a_active[:] = False
+    env.a_vel[:] = 0
+    for slot, (x, y), slot_size in ((0, (100, 100), size), (1, (700, 500), LARGE)):
+        env.a_active[0, slot] = True
+        env.a_pos[0, slot] = (x, y)
+        env.a_size[0, slot] = slot_size
+        env.a_hp[0, slot] = 1 if slot == 0 else 3
+    env.b_active[:] = False
+    env.b_active[0, 0] = True
+    env.b_pos[0, 0] = (100, 100)
+    env.b_vel[0, 0] = 0
+    env.b_lifetime[0, 0] = 10
+
+    env.step(np.zeros(1, dtype=np.int64))
+
+    children = np.flatnonzero(env.a_active[0])
+    children = children[children != 1]
+    assert len(children) == 2
+    assert (env.a_size[0, children] == size - 1).all()
+    assert np.allclose(env.a_pos[0, children], (100, 100))
+
+def test_random_play_never_leaves_size_zero_asteroids():
+    env = VecEnv(64, seed=3)
+    env.reset()
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        env.step(rng.integers(0, 16, 64))
+        assert not (env.a_active & (env.a_size < SMALL)).any()
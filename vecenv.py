@@ -0,0 +1,298 @@
+import argparse
+import time
+
+import numpy as np
+
+from simulation import SMALL, MEDIUM, LARGE, parse_seed, screen_width, screen_height
+
+# M games stepped together as stacked arrays, following the Game rules for
+# the ship, bullets, asteroids, splitting, lives and levels. Differences
+# from Game, to keep everything a whole-batch array operation:
+#   - collisions resolve simultaneously: every bullet touching an asteroid
+#     this tick deals its damage, rather than the first one consuming it;
+#   - no powerups, particles or level-complete pause (the next level starts
+#     on the tick the last asteroid dies);
+#   - splits that don't fit in max_asteroids are dropped.
+# Actions use the Input bitmask layout: left=1, right=2, up=4, fire=8.
+
+LEFT, RIGHT, UP, FIRE = 1, 2, 4, 8
+
+COS = np.cos(np.radians(np.arange(360)))
+SIN = np.sin(np.radians(np.arange(360)))
+
+# Indexed by asteroid size
+RADIUS = np.array([0, 20, 40, 60])
+HP = np.array([0, 1, 2, 3])
+SCORE = np.array([0, 100, 50, 20])
+MIN_SPEED = np.array([0, 3, 2, 1])
+
+SHIP_RADIUS = 15
+SHIP_FEATURES = 8
+ASTEROID_FEATURES = 5
+
+class VecEnv:
+    def __init__(self, num_envs, seed=None, max_asteroids=64, max_bullets=8,
+                 nearest=8, max_ticks=36000, width=screen_width, height=screen_height):
+        self.num_envs = num_envs
+        self.rng = np.random.default_rng(seed)
+        self.max_asteroids = max_asteroids
+        self.max_bullets = max_bullets
+        self.nearest = nearest
+        self.max_ticks = max_ticks
+        self.width = width
+        self.height = height
+        # Highest level whose opening wave (2 + 2 * level asteroids) fits
+        self.max_level = (max_asteroids - 2) // 2
+        self.observation_size = SHIP_FEATURES + nearest * ASTEROID_FEATURES
+
+        M, A, B = num_envs, max_asteroids, max_bullets
+        self.pos = np.zeros((M, 2))
+        self.vel = np.zeros((M, 2))
+        self.angle = np.zeros(M, dtype=np.int64)
+        self.lives = np.zeros(M, dtype=np.int64)
+        self.respawn_timer = np.zeros(M, dtype=np.int64)
+        self.invulnerable_timer = np.zeros(M, dtype=np.int64)
+        self.fire_cooldown = np.zeros(M, dtype=np.int64)
+        self.score = np.zeros(M, dtype=np.int64)
+        self.level = np.zeros(M, dtype=np.int64)
+        self.ticks = np.zeros(M, dtype=np.int64)
+
+        self.a_active = np.zeros((M, A), dtype=bool)
+        self.a_pos = np.zeros((M, A, 2))
+        self.a_vel = np.zeros((M, A, 2))
+        self.a_size = np.zeros((M, A), dtype=np.int64)
+        self.a_hp = np.zeros((M, A), dtype=np.int64)
+
+        self.b_active = np.zeros((M, B), dtype=bool)
+        self.b_pos = np.zeros((M, B, 2))
+        self.b_vel = np.zeros((M, B, 2))
+        self.b_lifetime = np.zeros((M, B), dtype=np.int64)
+
+    def reset(self):
+        self._reset(np.ones(self.num_envs, dtype=bool))
+        return self.observe()
+
+    def _reset(self, mask):
+        self.pos[mask] = (self.width // 2, self.height // 2)
+        self.vel[mask] = 0
+        self.angle[mask] = 0
+        self.lives[mask] = 3
+        self.respawn_timer[mask] = 0
+        self.invulnerable_timer[mask] = 0
+        self.fire_cooldown[mask] = 0
+        self.score[mask] = 0
+        self.level[mask] = 1
+        self.ticks[mask] = 0
+        self.b_active[mask] = False
+        self._start_level(mask)
+
+    def _start_level(self, mask):
+        games = np.flatnonzero(mask)
+        self.a_active[games] = False
+        level = np.minimum(self.level[games], self.max_level)
+        slots = np.arange(self.max_asteroids)
+        large = slots < (2 + level)[:, None]
+        medium = ~large & (slots < (2 + 2 * level)[:, None])
+        rows, a = np.nonzero(large | medium)
+        g = games[rows]
+        sizes = np.where(large[rows, a], LARGE, MEDIUM)
+
+        # Within 100px of a random corner, like Game.corner_position
+        n = len(g)
+        near = self.rng.integers(0, 101, (n, 2))
+        far = np.stack([self.rng.integers(self.width - 100, self.width + 1, n),
+                        self.rng.integers(self.height - 100, self.height + 1, n)], axis=1)
+        positions = np.where(self.rng.random((n, 2)) < 0.5, near, far)
+        self._spawn_asteroids(g, a, sizes, positions)
+
+    def _spawn_asteroids(self, games, slots, sizes, positions):
+        n = len(games)
+        speed = MIN_SPEED[sizes] + self.rng.random(n) * 2
+        angle = self.rng.uniform(0, 2 * np.pi, n)
+        self.a_active[games, slots] = True
+        self.a_pos[games, slots] = positions
+        self.a_vel[games, slots] = np.stack([speed * np.cos(angle), speed * np.sin(angle)], axis=1)
+        self.a_size[games, slots] = sizes
+        self.a_hp[games, slots] = HP[sizes]
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        left = (actions & LEFT) != 0
+        right = (actions & RIGHT) != 0
+        up = (actions & UP) != 0
+        fire = (actions & FIRE) != 0
+        games = np.arange(self.num_envs)
+        score_before = self.score.copy()
+        flying = self.respawn_timer <= 0
+
+        # Firing comes before the ship moves, as in Game.update
+        slot = np.argmin(self.b_active, axis=1)
+        firing = fire & flying & (self.fire_cooldown <= 0) & ~self.b_active[games, slot]
+        g, s = games[firing], slot[firing]
+        direction = np.stack([COS[self.angle[g]], SIN[self.angle[g]]], axis=1)
+        self.b_active[g, s] = True
+        self.b_pos[g, s] = self.pos[g] + 20 * direction
+        self.b_vel[g, s] = 10 * direction
+        self.b_lifetime[g, s] = 60
+        self.fire_cooldown[firing] = 15
+
+        # Ship
+        turn = np.where(left, -5, 0) + np.where(right, 5, 0)
+        self.angle = np.where(flying, (self.angle + turn) % 360, self.angle)
+        thrust = up & flying
+        self.vel[thrust, 0] += 0.2 * COS[self.angle[thrust]]
+        self.vel[thrust, 1] += 0.2 * SIN[self.angle[thrust]]
+        self.vel[flying] *= 0.98
+        speed = np.hypot(self.vel[:, 0], self.vel[:, 1])
+        too_fast = flying & (speed > 5)
+        self.vel[too_fast] *= (5 / speed[too_fast])[:, None]
+        self.pos[flying] += self.vel[flying]
+        self._wrap(self.pos, 0)
+        self.fire_cooldown[flying & (self.fire_cooldown > 0)] -= 1
+        self.invulnerable_timer[flying & (self.invulnerable_timer > 0)] -= 1
+
+        respawning = ~flying
+        self.respawn_timer[respawning] -= 1
+        back = respawning & (self.respawn_timer == 0)
+        self.pos[back] = (self.width // 2, self.height // 2)
+        self.vel[back] = 0
+        self.angle[back] = 0
+
+        # Asteroids and bullets
+        self.a_pos += self.a_vel
+        self._wrap(self.a_pos, RADIUS[self.a_size])
+        self.b_pos += self.b_vel
+        self.b_lifetime -= 1
+        self._wrap(self.b_pos, 0)
+        self.b_active &= self.b_lifetime > 0
+
+        self._bullet_collisions()
+        self._ship_collisions()
+
+        cleared = ~self.a_active.any(axis=1)
+        if cleared.any():
+            self.level[cleared] += 1
+            self.lives[cleared & (self.lives <= 996)] += 3
+            self._start_level(cleared)
+
+        self.ticks += 1
+        rewards = (self.score - score_before).astype(np.float32)
+        dones = (self.lives <= 0) | (self.ticks >= self.max_ticks)
+        info = {'score': self.score.copy(), 'level': self.level.copy(),
+                'ticks': self.ticks.copy()}
+        if dones.any():
+            self._reset(dones)
+        return self.observe(), rewards, dones, info
+
+    def _wrap(self, pos, margin):
+        for axis, limit in ((0, self.width), (1, self.height)):
+            coord = pos[..., axis]
+            low = coord < -margin
+            high = coord > limit + margin
+            coord[:] = np.where(low, limit + margin, np.where(high, -margin, coord))
+
+    def _bullet_collisions(self):
+        # Every live bullet against every asteroid slot of its own game as
+        # one (bullets, max_asteroids) distance matrix
+        g, b = np.nonzero(self.b_active)
+        dx = self.b_pos[g, b, 0][:, None] - self.a_pos[g, :, 0]
+        dy = self.b_pos[g, b, 1][:, None] - self.a_pos[g, :, 1]
+        radius = RADIUS[self.a_size[g]]
+        hits = (dx * dx + dy * dy < radius * radius) & self.a_active[g]
+
+        hit = hits.any(axis=1)
+        g, b, target = g[hit], b[hit], hits[hit].argmax(axis=1)
+        self.b_active[g, b] = False
+        damage = np.zeros(self.a_hp.shape, dtype=np.int64)
+        np.add.at(damage, (g, target), 1)
+
+        self.a_hp -= damage
+        self.score += 10 * damage.sum(axis=1)
+        destroyed = self.a_active & (damage > 0) & (self.a_hp <= 0)
+        self.score += (destroyed * SCORE[self.a_size]).sum(axis=1)
+        self.a_active &= ~destroyed
+        self._split(destroyed)
+
+    def _split(self, destroyed):
+        parents = destroyed & (self.a_size > SMALL)
+        if not parents.any():
+            return
+        # Children fill each game's free slots in order, two per parent
+        rank = np.cumsum(parents, axis=1) - 1
+        free_slots = np.argsort(self.a_active, axis=1, kind='stable')
+        free_count = (~self.a_active).sum(axis=1)
+        g, a = np.nonzero(parents)
+        # Read before spawning: the first child can land in its parent's slot
+        child_sizes = self.a_size[g, a] - 1
+        parent_pos = self.a_pos[g, a].copy()
+        for child in range(2):
+            index = 2 * rank[g, a] + child
+            fits = index < free_count[g]
+            slots = free_slots[g[fits], index[fits]]
+            self._spawn_asteroids(g[fits], slots, child_sizes[fits], parent_pos[fits])
+
+    def _ship_collisions(self):
+        dx = self.a_pos[..., 0] - self.pos[:, 0, None]
+        dy = self.a_pos[..., 1] - self.pos[:, 1, None]
+        reach = RADIUS[self.a_size] + SHIP_RADIUS
+        touching = (dx * dx + dy * dy < reach * reach) & self.a_active
+        hit = (touching.any(axis=1) & (self.respawn_timer <= 0)
+               & (self.invulnerable_timer <= 0))
+        self.lives[hit] -= 1
+        survived = hit & (self.lives > 0)
+        self.respawn_timer[survived] = 120
+        self.invulnerable_timer[survived] = 180
+
+    def observe(self):
+        M, K = self.num_envs, self.nearest
+        obs = np.zeros((M, self.observation_size), dtype=np.float32)
+        obs[:, 0] = self.pos[:, 0] / self.width
+        obs[:, 1] = self.pos[:, 1] / self.height
+        obs[:, 2:4] = self.vel / 5
+        obs[:, 4] = COS[self.angle]
+        obs[:, 5] = SIN[self.angle]
+        obs[:, 6] = self.respawn_timer > 0
+        obs[:, 7] = self.fire_cooldown / 15
+
+        # K nearest asteroids, measured the short way round the wrap
+        size = np.array([self.width, self.height])
+        half = size / 2
+        offset = self.a_pos - self.pos[:, None, :]
+        offset -= np.where(offset > half, size, 0)
+        offset += np.where(offset < -half, size, 0)
+        dist = np.where(self.a_active, offset[..., 0] ** 2 + offset[..., 1] ** 2, np.inf)
+        k = min(K, self.max_asteroids)
+        rows = np.arange(M)[:, None]
+        order = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        order = order[rows, np.argsort(dist[rows, order], axis=1)]
+        present = np.isfinite(dist[rows, order])
+        features = np.concatenate([
+            offset[rows, order] / size,
+            self.a_vel[rows, order] / 5,
+            (RADIUS[self.a_size[rows, order]] / 60)[..., None],
+        ], axis=-1) * present[..., None]
+        obs[:, SHIP_FEATURES:SHIP_FEATURES + k * ASTEROID_FEATURES] = features.reshape(M, -1)
+        return obs
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure VecEnv throughput")
+    parser.add_argument('--envs', type=int, default=1024)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', type=parse_seed, default=0)
+    args = parser.parse_args()
+
+    env = VecEnv(args.envs, args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    total_reward = 0.0
+    for _ in range(args.steps):
+        obs, rewards, dones, info = env.step(rng.integers(0, 16, args.envs))
+        total_reward += rewards.sum()
+    elapsed = time.perf_counter() - start
+    samples = args.envs * args.steps
+    print(f"{samples} game steps in {elapsed:.2f}s ({samples / elapsed:.0f} steps/s), "
+          f"mean reward per game {total_reward / args.envs:.0f}")
+
+if __name__ == "__main__":
+    main()